@@ -0,0 +1,141 @@
+"""
+Typed Parquet store for everything under data/cleaned.
+
+Cleaning scripts save their outputs with `save_artifact`, which casts the
+frame to the artifact's schema (categorical `type`, nullable Int64 ids and
+counts, COORD_DTYPE lat/lon) and writes `<name>.parquet` next to the old CSV. The CSV
+is still written by default for notebooks that read it directly.
+
+Downstream code reads with `load_artifact(name, columns=[...])`, which only
+decodes the requested columns and falls back to the CSV (cast to the same
+schema) when the parquet has not been built yet. Running this module converts
+the cleaned CSVs of the named artifacts (all of them by default) to parquet,
+which is how the hand-curated tables (coords, dorms, hotspots) are rebuilt.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+CLEANED_DIR = Path(__file__).resolve().parent.parent / "cleaned"
+
+COORD_COLS = ("lat", "lon")
+
+# float32 rounds Austin longitudes to ~0.7 m, enough to move every v5
+# distance feature and flip stations across buffer edges, so coordinates
+# stay float64
+COORD_DTYPE = "float64"
+
+# LODES WAC segment counts written by jobs.py (ca01-ca03, ce01-ce03, cns01-cns20)
+JOB_SEGMENT_DTYPES = {
+    col: "Int64"
+    for col in ["ca01", "ca02", "ca03", "ce01", "ce02", "ce03"]
+    + [f"cns{i:02d}" for i in range(1, 21)]
+}
+
+# name -> (path under data/cleaned without extension, extra column dtypes)
+ARTIFACTS = {
+    "amenities": ("amenities/amenities", {}),
+    "dining_halls": ("amenities/dining_halls", {}),
+    "ut_hotspots": ("amenities/ut_hotspots", {}),
+    "coords": ("coords/coords", {}),
+    "raw_scores_with_coords": ("coords/semi_cleaned/raw_scores_with_coords", {}),
+    "housing": ("housing/housing", {"count": "Int64"}),
+    "dorms": ("housing/dorms", {"population": "Int64"}),
+    "wampus_hotspots": ("housing/wampus_hotspots", {}),
+    "jobs": ("jobs/jobs", {"job_count": "Int64", **JOB_SEGMENT_DTYPES}),
+    "pois": ("pois/pois", {"category": "category"}),
+    "retail": ("retail/retail", {}),
+    "current_stations": (
+        "scoring/current_stations",
+        {
+            "district": "Int64",
+            "trips": "Int64",
+            "total_docks": "Int64",
+            "trips_per_dock": "float64",
+        },
+    ),
+    "projected_stations": (
+        "scoring/projected_stations",
+        {"district": "Int64", "total_docks": "Int64"},
+    ),
+    # clean_names builds "string" (pd.NA); stored as the default "str" dtype
+    "transit": ("transit/transit", {"name": "str"}),
+    "station_reach": ("isochrones/station_reach", {}),
+}
+
+
+def artifact_path(name, suffix=".parquet"):
+    if name not in ARTIFACTS:
+        raise KeyError(f"Unknown artifact {name!r}; expected one of {list(ARTIFACTS)}")
+    return CLEANED_DIR / (ARTIFACTS[name][0] + suffix)
+
+
+def artifact_dtypes(name, columns):
+    """Schema for the given columns of artifact `name`."""
+    extra = ARTIFACTS[name][1]
+    dtypes = {}
+    for col in columns:
+        if col in extra:
+            dtypes[col] = extra[col]
+        elif col in COORD_COLS:
+            dtypes[col] = COORD_DTYPE
+        elif col == "type":
+            dtypes[col] = "category"
+        elif col == "id":
+            dtypes[col] = "Int64"
+    return dtypes
+
+
+def _apply_schema(df, name):
+    df = df.copy()
+    for col, dtype in artifact_dtypes(name, df.columns).items():
+        if col in COORD_COLS or dtype == "Int64":
+            # CSVs carry stray whitespace, e.g. " 30.28" in the hotspot files
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def save_artifact(df, name, csv=True):
+    """
+    Write `df` as the typed parquet artifact `name`, plus the CSV side output
+    unless `csv=False`. Returns the typed frame.
+    """
+    path = artifact_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if csv:
+        df.to_csv(artifact_path(name, ".csv"), index=False)
+
+    typed = _apply_schema(df.reset_index(drop=True), name)
+    typed.to_parquet(path, index=False)
+    return typed
+
+
+def load_artifact(name, columns=None):
+    """
+    Typed frame for artifact `name`, reading only `columns` when given.
+
+    Reads the parquet when it exists, otherwise the CSV.
+    """
+    path = artifact_path(name)
+    if path.exists():
+        return pd.read_parquet(path, columns=columns)
+
+    df = pd.read_csv(artifact_path(name, ".csv"), usecols=columns)
+    if columns is not None:
+        df = df[list(columns)]
+    return _apply_schema(df, name)
+
+
+if __name__ == "__main__":
+    import sys
+
+    for name in sys.argv[1:] or ARTIFACTS:
+        csv_path = artifact_path(name, ".csv")
+        if not csv_path.exists():
+            print(f"skip {name}: {csv_path} not found")
+            continue
+        typed = save_artifact(pd.read_csv(csv_path), name, csv=False)
+        print(f"{name}: {typed.shape} -> {artifact_path(name)}")
@@ -1,10 +1,15 @@
 # %%
 import re
+import sys
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely import wkt
+from park_features import load_parks
+from projection import METRIC_CRS
+
+sys.path.append("..")
+from artifacts import load_artifact
 
 pd.set_option("display.max_rows", 100)
 pd.set_option("display.max_columns", 100)
@@ -12,14 +17,14 @@ pd.set_option("display.max_columns", 100)
 # %%
 prefix = "../../cleaned/"
 
-amenities = pd.read_csv(prefix + "amenities/amenities.csv")
-coords = pd.read_csv(prefix + "coords/coords.csv")
-housing = pd.read_csv(prefix + "housing/housing.csv")
-jobs = pd.read_csv(prefix + "jobs/jobs.csv")
-retail = pd.read_csv(prefix + "retail/retail.csv")
-scores = pd.read_csv(prefix + "scoring/current_stations.csv")
-transit = pd.read_csv(prefix + "transit/transit.csv")
-parks = pd.read_csv(prefix + "amenities/parks.csv")
+amenities = load_artifact("amenities")
+coords = load_artifact("coords")
+housing = load_artifact("housing")
+jobs = load_artifact("jobs")
+retail = load_artifact("retail")
+scores = load_artifact("current_stations")
+transit = load_artifact("transit")
+parks = load_parks(prefix + "amenities/")
 
 scores_and_coords = scores.merge(coords, left_on="name", right_on="scoring_name")
 
@@ -45,10 +50,10 @@ stops_gdf = gpd.GeoDataFrame(
 
 # -----------------------------
 # 3. Project to meters
-#    EPSG:3857 is fine for this
+#    UTM 14N (METRIC_CRS); Web Mercator would stretch distances ~15% here
 # -----------------------------
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-stops_gdf = stops_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+stops_gdf = stops_gdf.to_crs(METRIC_CRS)
 
 # -----------------------------
 # 4. Buffer each station by 275m
@@ -100,8 +105,8 @@ jobs_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-jobs_gdf = jobs_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+jobs_gdf = jobs_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -139,8 +144,8 @@ housing_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-housing_gdf = housing_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+housing_gdf = housing_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -178,8 +183,8 @@ amenities_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-amenities_gdf = amenities_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+amenities_gdf = amenities_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -212,16 +217,8 @@ stations_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-# convert park geometry strings into real geometries
-parks_polys["geometry"] = parks_polys["geometry"].apply(wkt.loads)
-
-parks_gdf = gpd.GeoDataFrame(
-    parks_polys,
-    geometry="geometry",
-)
-
-# Austin-looking projected coords: try UTM Zone 14N
-parks_gdf = parks_gdf.set_crs("EPSG:32614")  # WGS84 / UTM zone 14N
+# park polygons are lon/lat; project to UTM Zone 14N for meters
+parks_gdf = parks_polys.to_crs(METRIC_CRS)
 
 # project stations into same CRS as parks
 stations_gdf = stations_gdf.to_crs(parks_gdf.crs)
@@ -272,8 +269,8 @@ retail_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-retail_gdf = retail_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+retail_gdf = retail_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -300,7 +297,7 @@ stations_gdf = gpd.GeoDataFrame(
     stations,
     geometry=gpd.points_from_xy(stations["lon"], stations["lat"]),
     crs="EPSG:4326",
-).to_crs(epsg=3857)
+).to_crs(METRIC_CRS)
 
 stations_gdf = stations_gdf[["id", "name", "geometry"]].copy()
 
@@ -412,10 +409,8 @@ scores_and_coords["name"] = scores_and_coords["name"].apply(to_snake_case)
 scores_and_coords = scores_and_coords[
     [
         "id",
-        "active_date",
         "name",
         "district",
-        "total_checkouts",
         "total_docks",
         "trips_per_dock",
         "ebs_station",
@@ -535,7 +530,7 @@ target = "trips_per_dock"  # or "total_checkouts"
 # ----------------------------
 # 3. columns to drop from X
 # ----------------------------
-drop_cols = ["id", "active_date", "total_checkouts", "active_date", "district"]
+drop_cols = ["id", "district"]
 
 # ----------------------------
 # 4. columns to leave alone
@@ -1,10 +1,16 @@
 # %%
 import re
+import sys
 
 import geopandas as gpd
-import numpy as np
 import pandas as pd
-from shapely import wkt
+from park_features import load_parks
+from projection import METRIC_CRS
+from spatial_index import points_xy
+from station_network import station_network_features
+
+sys.path.append("..")
+from artifacts import load_artifact
 
 pd.set_option("display.max_rows", 100)
 pd.set_option("display.max_columns", 100)
@@ -12,16 +18,16 @@ pd.set_option("display.max_columns", 100)
 # %%
 cleaned_prefix = "../../cleaned/"
 
-amenities = pd.read_csv(cleaned_prefix + "amenities/amenities.csv")
-coords = pd.read_csv(cleaned_prefix + "coords/coords.csv")
-housing = pd.read_csv(cleaned_prefix + "housing/housing.csv")
-jobs = pd.read_csv(cleaned_prefix + "jobs/jobs.csv")
-retail = pd.read_csv(cleaned_prefix + "retail/retail.csv")
-scores = pd.read_csv(cleaned_prefix + "scoring/current_stations.csv")
-transit = pd.read_csv(cleaned_prefix + "transit/transit.csv")
-parks = pd.read_csv(cleaned_prefix + "amenities/parks.csv")
-dining_halls = pd.read_csv(cleaned_prefix + "amenities/dining_halls.csv")
-dorms = pd.read_csv(cleaned_prefix + "housing/dorms.csv")
+amenities = load_artifact("amenities")
+coords = load_artifact("coords")
+housing = load_artifact("housing")
+jobs = load_artifact("jobs")
+retail = load_artifact("retail")
+scores = load_artifact("current_stations")
+transit = load_artifact("transit")
+parks = load_parks(cleaned_prefix + "amenities/")
+dining_halls = load_artifact("dining_halls")
+dorms = load_artifact("dorms")
 
 scores_and_coords = scores.merge(
     coords, left_on="name", right_on="scoring_name", how="left"
@@ -49,10 +55,10 @@ stops_gdf = gpd.GeoDataFrame(
 
 # -----------------------------
 # 3. Project to meters
-#    EPSG:3857 is fine for this
+#    UTM 14N (METRIC_CRS); Web Mercator would stretch distances ~15% here
 # -----------------------------
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-stops_gdf = stops_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+stops_gdf = stops_gdf.to_crs(METRIC_CRS)
 
 # -----------------------------
 # 4. Buffer each station by 275m
@@ -104,8 +110,8 @@ stops_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-stops_gdf = stops_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+stops_gdf = stops_gdf.to_crs(METRIC_CRS)
 
 stations_gdf["nearest_transit_stop_dist_m"] = stations_gdf.geometry.apply(
     lambda station_geom: stops_gdf.distance(station_geom).min()
@@ -140,8 +146,8 @@ jobs_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-jobs_gdf = jobs_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+jobs_gdf = jobs_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -179,8 +185,8 @@ housing_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-housing_gdf = housing_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+housing_gdf = housing_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -218,8 +224,8 @@ amenities_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-amenities_gdf = amenities_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+amenities_gdf = amenities_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -252,16 +258,8 @@ stations_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-# convert park geometry strings into real geometries
-parks_polys["geometry"] = parks_polys["geometry"].apply(wkt.loads)
-
-parks_gdf = gpd.GeoDataFrame(
-    parks_polys,
-    geometry="geometry",
-)
-
-# Austin-looking projected coords: try UTM Zone 14N
-parks_gdf = parks_gdf.set_crs("EPSG:32614")  # WGS84 / UTM zone 14N
+# park polygons are lon/lat; project to UTM Zone 14N for meters
+parks_gdf = parks_polys.to_crs(METRIC_CRS)
 
 # project stations into same CRS as parks
 stations_gdf = stations_gdf.to_crs(parks_gdf.crs)
@@ -306,8 +304,7 @@ stations_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-parks_polys["geometry"] = parks_polys["geometry"].apply(wkt.loads)
-parks_gdf = gpd.GeoDataFrame(parks_polys, geometry="geometry").set_crs("EPSG:32614")
+parks_gdf = parks_polys.to_crs(METRIC_CRS)
 
 stations_gdf = stations_gdf.to_crs(parks_gdf.crs)
 
@@ -345,8 +342,8 @@ retail_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-retail_gdf = retail_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+retail_gdf = retail_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -382,8 +379,8 @@ retail_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-retail_gdf = retail_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+retail_gdf = retail_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "name", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(275)
@@ -439,60 +436,16 @@ stations_gdf = gpd.GeoDataFrame(
     stations,
     geometry=gpd.points_from_xy(stations["lon"], stations["lat"]),
     crs="EPSG:4326",
-).to_crs(epsg=3857)
+).to_crs(METRIC_CRS)
 
 stations_gdf = stations_gdf[["id", "name", "geometry"]].copy()
 
 # %%
 # -----------------------------
-# Pairwise distance matrix (meters)
+# Distance-based connectivity features (meters)
 # -----------------------------
-station_ids = stations_gdf["id"].values
-n = len(stations_gdf)
-
-dist_array = np.zeros((n, n))
-
-for i in range(n):
-    for j in range(n):
-        dist_array[i, j] = stations_gdf.geometry.iloc[i].distance(
-            stations_gdf.geometry.iloc[j]
-        )
-
-dist_matrix = pd.DataFrame(
-    dist_array,
-    index=station_ids,
-    columns=station_ids,
-)
-
-# %%
-# -----------------------------
-# Distance-based connectivity features
-# -----------------------------
-dist_no_self_array = dist_matrix.to_numpy(copy=True)
-np.fill_diagonal(dist_no_self_array, np.nan)
-
-dist_no_self = pd.DataFrame(
-    dist_no_self_array,
-    index=dist_matrix.index,
-    columns=dist_matrix.columns,
-)
-
-dist_features = pd.DataFrame(index=dist_no_self.index)
-
-# nearest other station
-dist_features["nearest_station_dist_m"] = dist_no_self.min(axis=1)
-
-# number of stations within thresholds
-dist_features["stations_within_500m"] = (dist_no_self <= 500).sum(axis=1)
-dist_features["stations_within_1000m"] = (dist_no_self <= 1000).sum(axis=1)
-
-# average distance to 3 nearest stations
-dist_features["avg_stations_dist_3_nearest_m"] = dist_no_self.apply(
-    lambda row: np.sort(row.dropna().values)[:3].mean()
-    if row.dropna().shape[0] >= 3
-    else np.nan,
-    axis=1,
-)
+dist_features = station_network_features(points_xy(stations_gdf))
+dist_features.index = stations_gdf["id"].values
 
 # %%
 # -----------------------------
@@ -547,8 +500,8 @@ dining_halls_gdf = gpd.GeoDataFrame(
 )
 
 # project to meters
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-dining_halls_gdf = dining_halls_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+dining_halls_gdf = dining_halls_gdf.to_crs(METRIC_CRS)
 
 # compute nearest dining hall distance for each station
 stations_gdf["nearest_dining_hall_dist_m"] = stations_gdf.geometry.apply(
@@ -586,8 +539,8 @@ dorms_gdf = gpd.GeoDataFrame(
 )
 
 # project to meters
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-dorms_gdf = dorms_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+dorms_gdf = dorms_gdf.to_crs(METRIC_CRS)
 
 
 # for each station, find nearest dorm and pull both distance + population
@@ -637,8 +590,8 @@ dorms_gdf = gpd.GeoDataFrame(
     crs="EPSG:4326",
 )
 
-stations_gdf = stations_gdf.to_crs(epsg=3857)
-dorms_gdf = dorms_gdf.to_crs(epsg=3857)
+stations_gdf = stations_gdf.to_crs(METRIC_CRS)
+dorms_gdf = dorms_gdf.to_crs(METRIC_CRS)
 
 stations_buffer = stations_gdf[["id", "geometry"]].copy()
 stations_buffer["geometry"] = stations_buffer.geometry.buffer(500)
@@ -1,11 +1,18 @@
 # %%
 import re
+import sys
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely import wkt
+from park_features import load_parks
+from projection import METRIC_CRS
 from sklearn.preprocessing import StandardScaler
+from spatial_index import points_xy
+from station_network import station_network_features
+
+sys.path.append("..")
+from artifacts import load_artifact
 
 pd.set_option("display.max_rows", 100)
 pd.set_option("display.max_columns", 100)
@@ -13,16 +20,16 @@ pd.set_option("display.max_columns", 100)
 # %%
 cleaned_prefix = "../../cleaned/"
 
-amenities = pd.read_csv(cleaned_prefix + "amenities/amenities.csv")
-coords = pd.read_csv(cleaned_prefix + "coords/coords.csv")
-housing = pd.read_csv(cleaned_prefix + "housing/housing.csv")
-jobs = pd.read_csv(cleaned_prefix + "jobs/jobs.csv")
-retail = pd.read_csv(cleaned_prefix + "retail/retail.csv")
-scores = pd.read_csv(cleaned_prefix + "scoring/current_stations.csv")
-transit = pd.read_csv(cleaned_prefix + "transit/transit.csv")
-parks = pd.read_csv(cleaned_prefix + "amenities/parks.csv")
-dining_halls = pd.read_csv(cleaned_prefix + "amenities/dining_halls.csv")
-dorms = pd.read_csv(cleaned_prefix + "housing/dorms.csv")
+amenities = load_artifact("amenities")
+coords = load_artifact("coords")
+housing = load_artifact("housing")
+jobs = load_artifact("jobs")
+retail = load_artifact("retail")
+scores = load_artifact("current_stations")
+transit = load_artifact("transit")
+parks = load_parks(cleaned_prefix + "amenities/")
+dining_halls = load_artifact("dining_halls")
+dorms = load_artifact("dorms")
 
 scores_and_coords = scores.merge(
     coords, left_on="name", right_on="scoring_name", how="left"
@@ -83,13 +90,13 @@ def add_count_within_buffer(
     source_filter_col=None,
     source_filter_values=None,
 ):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
 
     src = source_df.copy()
     if source_filter_col is not None and source_filter_values is not None:
         src = src[src[source_filter_col].isin(source_filter_values)].copy()
 
-    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(epsg=3857)
+    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(METRIC_CRS)
 
     stations_buffer = stations_gdf[["id", "geometry"]].copy()
     stations_buffer["geometry"] = stations_buffer.geometry.buffer(buffer_m)
@@ -113,13 +120,13 @@ def add_sum_within_buffer(
     source_filter_col=None,
     source_filter_values=None,
 ):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
 
     src = source_df.copy()
     if source_filter_col is not None and source_filter_values is not None:
         src = src[src[source_filter_col].isin(source_filter_values)].copy()
 
-    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(epsg=3857)
+    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(METRIC_CRS)
 
     stations_buffer = stations_gdf[["id", "geometry"]].copy()
     stations_buffer["geometry"] = stations_buffer.geometry.buffer(buffer_m)
@@ -141,13 +148,13 @@ def add_nearest_distance(
     source_filter_col=None,
     source_filter_values=None,
 ):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
 
     src = source_df.copy()
     if source_filter_col is not None and source_filter_values is not None:
         src = src[src[source_filter_col].isin(source_filter_values)].copy()
 
-    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(epsg=3857)
+    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(METRIC_CRS)
 
     stations_gdf[out_col] = stations_gdf.geometry.apply(
         lambda station_geom: source_gdf.distance(station_geom).min()
@@ -170,13 +177,13 @@ def add_avg_k_nearest_distance(
     source_filter_col=None,
     source_filter_values=None,
 ):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
 
     src = source_df.copy()
     if source_filter_col is not None and source_filter_values is not None:
         src = src[src[source_filter_col].isin(source_filter_values)].copy()
 
-    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(epsg=3857)
+    source_gdf = make_points_gdf(src, source_lat_col, source_lon_col).to_crs(METRIC_CRS)
 
     def avg_k_dist(station_geom):
         if len(source_gdf) == 0:
@@ -192,8 +199,8 @@ def add_avg_k_nearest_distance(
 
 
 def add_nearest_dorm_info(base_df, dorms_df):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
-    dorms_gdf = make_points_gdf(dorms_df, "lat", "lon").to_crs(epsg=3857)
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
+    dorms_gdf = make_points_gdf(dorms_df, "lat", "lon").to_crs(METRIC_CRS)
 
     def nearest_dorm(station_geom):
         dists = dorms_gdf.geometry.distance(station_geom)
@@ -220,50 +227,11 @@ def add_nearest_dorm_info(base_df, dorms_df):
 
 
 def add_network_features(base_df):
-    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(epsg=3857)
-
-    def station_network_metrics(row):
-        dists = stations_gdf.geometry.distance(row.geometry)
-        dists = dists[dists > 0].sort_values()
-
-        nearest_station_dist_m = dists.iloc[0] if len(dists) >= 1 else np.nan
-        stations_within_500m = int((dists <= 500).sum())
-        stations_within_1000m = int((dists <= 1000).sum())
-        avg_stations_dist_3_nearest_m = (
-            dists.iloc[:3].mean() if len(dists) >= 3 else np.nan
-        )
-
-        return pd.Series(
-            {
-                "nearest_station_dist_m": nearest_station_dist_m,
-                "stations_within_500m": stations_within_500m,
-                "stations_within_1000m": stations_within_1000m,
-                "avg_stations_dist_3_nearest_m": avg_stations_dist_3_nearest_m,
-            }
-        )
+    stations_gdf = make_points_gdf(base_df, "lat", "lon").to_crs(METRIC_CRS)
+    metrics = station_network_features(points_xy(stations_gdf))
+    metrics["id"] = stations_gdf["id"].to_numpy()
 
-    stations_gdf[
-        [
-            "nearest_station_dist_m",
-            "stations_within_500m",
-            "stations_within_1000m",
-            "avg_stations_dist_3_nearest_m",
-        ]
-    ] = stations_gdf.apply(station_network_metrics, axis=1)
-
-    out = base_df.merge(
-        stations_gdf[
-            [
-                "id",
-                "nearest_station_dist_m",
-                "stations_within_500m",
-                "stations_within_1000m",
-                "avg_stations_dist_3_nearest_m",
-            ]
-        ],
-        on="id",
-        how="left",
-    )
+    out = base_df.merge(metrics, on="id", how="left")
 
     out["nearest_station_dist_m"] = out["nearest_station_dist_m"].round(2)
     out["avg_stations_dist_3_nearest_m"] = out["avg_stations_dist_3_nearest_m"].round(2)
@@ -274,9 +242,7 @@ def add_network_features(base_df):
 def add_park_area_within_buffer(base_df, parks_df, buffer_m=275):
     stations_gdf = make_points_gdf(base_df, "lat", "lon")
 
-    parks_polys = parks_df.copy()
-    parks_polys["geometry"] = parks_polys["geometry"].apply(wkt.loads)
-    parks_gdf = gpd.GeoDataFrame(parks_polys, geometry="geometry").set_crs("EPSG:32614")
+    parks_gdf = parks_df.to_crs(METRIC_CRS)
 
     stations_gdf = stations_gdf.to_crs(parks_gdf.crs)
 
@@ -301,9 +267,7 @@ def add_park_area_within_buffer(base_df, parks_df, buffer_m=275):
 def add_nearest_park_distance(base_df, parks_df):
     stations_gdf = make_points_gdf(base_df, "lat", "lon")
 
-    parks_polys = parks_df.copy()
-    parks_polys["geometry"] = parks_polys["geometry"].apply(wkt.loads)
-    parks_gdf = gpd.GeoDataFrame(parks_polys, geometry="geometry").set_crs("EPSG:32614")
+    parks_gdf = parks_df.to_crs(METRIC_CRS)
 
     stations_gdf = stations_gdf.to_crs(parks_gdf.crs)
 
@@ -0,0 +1,173 @@
+"""
+Standardization parameters of an ML dataset, persisted next to it.
+
+combined_dataset_v5.py fits a StandardScaler on the station table and writes
+only the scaled values to ml_dataset_v5.csv. Scaling new points the same way
+used to mean rebuilding the whole station table to refit the scaler. Instead
+the script saves the fitted per-column mean and scale as
+ml_dataset_v5.scaler.json, and `FeatureScaler.transform` applies them to any
+number of rows in one vectorized expression, with results identical to
+`StandardScaler.transform`.
+
+The JSON records the content hash of the dataset it was written with
+(the same hash models/registry.py keys models on), and `load_scaler`
+refuses a file whose dataset has been rebuilt since.
+
+Standardization is per column, so any subset of the columns can be scaled
+on its own. compute_station_features returns the location features but not
+the rubric column total_docks, so pass the columns it has:
+
+    scaler = load_scaler(5)
+    features = compute_station_features(points, sources)
+    columns = [col for col in scaler.columns if col in features.columns]
+    X = scaler.transform(features, columns)   # -> ml_dataset_v5 units
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+DATASET_DIR = Path(__file__).resolve().parents[2] / "cleaned/combined_datasets"
+
+
+def dataset_version(path):
+    """Content hash of a dataset file, as in models/registry.py."""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()[:10]
+
+
+def ml_dataset_path(version):
+    return DATASET_DIR / f"v{version}" / f"ml_dataset_v{version}.csv"
+
+
+def scaler_path(dataset_path):
+    """ml_dataset_vN.csv -> ml_dataset_vN.scaler.json next to it."""
+    return Path(dataset_path).with_suffix(".scaler.json")
+
+
+def _replace_columns(df, columns, values):
+    """
+    Copy of `df` with `columns` set to the matching columns of `values`, in
+    one block rather than one column assignment at a time.
+    """
+    block = pd.DataFrame(values, columns=columns, index=df.index)
+    return pd.concat([df.drop(columns=columns), block], axis=1)[list(df.columns)]
+
+
+class FeatureScaler:
+    """Per-column mean and scale; transform is (x - mean) / scale."""
+
+    def __init__(self, columns, mean, scale, n_samples=None, dataset_version=None):
+        self.columns = list(columns)
+        self.mean = np.asarray(mean, dtype="float64")
+        self.scale = np.asarray(scale, dtype="float64")
+        self.n_samples = n_samples
+        self.dataset_version = dataset_version
+        if not (len(self.columns) == len(self.mean) == len(self.scale)):
+            raise ValueError("columns, mean and scale differ in length")
+
+    @classmethod
+    def from_fitted(cls, scaler, columns):
+        """Parameters of a fitted sklearn StandardScaler over `columns`."""
+        n_samples = np.ravel(scaler.n_samples_seen_)[0]
+        return cls(columns, scaler.mean_, scaler.scale_, n_samples=int(n_samples))
+
+    def _params(self, df, columns):
+        """(columns, mean, scale) for `columns` (default: all scaled ones)."""
+        columns = self.columns if columns is None else list(columns)
+        unknown = [col for col in columns if col not in self.columns]
+        if unknown:
+            raise KeyError(f"columns not in scaler: {unknown}")
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise KeyError(f"columns not in frame: {missing}")
+        pos = [self.columns.index(col) for col in columns]
+        return columns, self.mean[pos], self.scale[pos]
+
+    def transform(self, df, columns=None):
+        """
+        Copy of `df` with `columns` (default: every scaled column)
+        standardized; other columns are passed through.
+        """
+        columns, mean, scale = self._params(df, columns)
+        values = (df[columns].to_numpy(dtype="float64") - mean) / scale
+        return _replace_columns(df, columns, values)
+
+    def inverse_transform(self, df, columns=None):
+        """Copy of `df` with `columns` back in original units."""
+        columns, mean, scale = self._params(df, columns)
+        values = df[columns].to_numpy(dtype="float64") * scale + mean
+        return _replace_columns(df, columns, values)
+
+    def save(self, dataset_path, path=None):
+        """
+        Write the parameters as JSON (next to `dataset_path` by default),
+        stamped with the dataset's content hash; returns the path written.
+        """
+        path = Path(path) if path else scaler_path(dataset_path)
+        self.dataset_version = dataset_version(dataset_path)
+        meta = {
+            "dataset": Path(dataset_path).name,
+            "dataset_version": self.dataset_version,
+            "n_samples": self.n_samples,
+            "sklearn": sklearn.__version__,
+            "columns": self.columns,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+        }
+        path.write_text(json.dumps(meta, indent=2) + "\n")
+        return path
+
+
+def load_scaler(dataset, check=True):
+    """
+    FeatureScaler saved for `dataset` (a version number or an ml_dataset
+    path). With `check`, raises ValueError if the dataset has changed
+    since the scaler was written.
+    """
+    dataset_path = ml_dataset_path(dataset) if isinstance(dataset, int) else dataset
+    path = scaler_path(dataset_path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"no scaler at {path}; rebuild the dataset with its combined_dataset script"
+        )
+    meta = json.loads(path.read_text())
+    if check and meta["dataset_version"] != dataset_version(dataset_path):
+        raise ValueError(
+            f"{path.name} was written for dataset version {meta['dataset_version']}, "
+            f"but {Path(dataset_path).name} is now {dataset_version(dataset_path)}"
+        )
+    return FeatureScaler(
+        meta["columns"],
+        meta["mean"],
+        meta["scale"],
+        n_samples=meta["n_samples"],
+        dataset_version=meta["dataset_version"],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scale a CSV of raw feature rows to ml_dataset units."
+    )
+    parser.add_argument("features", help="CSV with the raw feature columns")
+    parser.add_argument("--version", type=int, default=5)
+    parser.add_argument(
+        "--columns", nargs="+", help="scaled columns to standardize (default: all)"
+    )
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    scaler = load_scaler(args.version)
+    scaled = scaler.transform(pd.read_csv(args.features), args.columns)
+    scaled.to_csv(args.output, index=False)
+    n_columns = len(args.columns or scaler.columns)
+    print(f"{len(scaled)} rows x {n_columns} scaled columns -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
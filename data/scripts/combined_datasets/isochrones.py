@@ -0,0 +1,233 @@
+"""
+Per-station bike isochrones, cached as GeoParquet.
+
+Each station's 5 / 10 / 15-minute isochrone is the street network it can
+reach at BIKE_SPEED_M_PER_MIN, as a StreetNetwork Dijkstra limited to the
+longest budget: every edge whose two ends are reachable, plus the station
+itself, buffered by EDGE_BUFFER_M. The polygons are stored at
+ISOCHRONE_PATH in the metric CRS, one row per (station id, minutes, network
+version), together with the station coordinates they were built from.
+
+`update_isochrones` reuses every cached row whose station coordinates and
+network version still match, so adding or moving a station in coords.csv
+only recomputes that station. `reach_features` then counts / sums jobs,
+housing, transit, amenities and retail inside each polygon with one STRtree
+query per source table.
+
+    python isochrones.py                  # refresh the cache, write reach
+    python isochrones.py --graphml other_network.graphml
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from projection import METRIC_CRS, project_to_metric
+from scipy.sparse import csgraph
+from street_network import DEFAULT_GRAPHML, load_street_network
+
+sys.path.append("..")
+from artifacts import load_artifact, save_artifact
+
+ISOCHRONE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "cleaned"
+    / "isochrones"
+    / "station_isochrones.parquet"
+)
+
+ISOCHRONE_MINUTES = (5, 10, 15)
+
+# ~15 km/h, a relaxed bikeshare pace including stops
+BIKE_SPEED_M_PER_MIN = 250
+
+# Half-width of the corridor drawn around each reachable edge
+EDGE_BUFFER_M = 50
+
+ISOCHRONE_COLUMNS = ["id", "minutes", "network_version", "lat", "lon", "geometry"]
+
+# source table -> value column summed inside each isochrone (None counts rows)
+REACH_SOURCES = {
+    "jobs": "job_count",
+    "housing": "count",
+    "transit": None,
+    "amenities": None,
+    "retail": None,
+}
+
+
+def station_isochrones(network, stations, minutes=ISOCHRONE_MINUTES, chunk_size=64):
+    """
+    Isochrone polygons for every row of `stations` (id, lat, lon), one row
+    per (station, minutes budget), geometry in the network's metric CRS.
+
+    Each edge's corridor is buffered once, the first time any station
+    reaches it, and each budget's polygon is the previous budget's polygon
+    unioned with only the newly reachable corridors.
+    """
+    minutes = sorted(minutes)
+    budgets = np.asarray(minutes) * BIKE_SPEED_M_PER_MIN
+    station_xy = np.column_stack(project_to_metric(stations["lat"], stations["lon"]))
+    station_node, station_off = network.snap(station_xy)
+
+    # one corridor per street: drop the reverse copy of two-way edges
+    lo, hi = np.minimum(network.u, network.v), np.maximum(network.u, network.v)
+    _, first = np.unique(lo * len(network) + hi, return_index=True)
+    u, v = network.u[first], network.v[first]
+    corridors = np.empty(len(u), dtype=object)
+    buffered = np.zeros(len(u), dtype=bool)
+
+    rows = []
+    for start in range(0, len(stations), chunk_size):
+        node_dists = csgraph.dijkstra(
+            network.graph,
+            indices=station_node[start : start + chunk_size],
+            limit=budgets.max(),
+        )
+        for offset, dists in enumerate(node_dists):
+            pos = start + offset
+            dists = dists + station_off[pos]
+            reach = shapely.buffer(shapely.points(station_xy[pos]), EDGE_BUFFER_M)
+            prev = np.zeros(len(u), dtype=bool)
+            for budget_min, budget_m in zip(minutes, budgets):
+                edges = (dists[u] <= budget_m) & (dists[v] <= budget_m)
+                new = edges & ~prev
+                todo = new & ~buffered
+                corridors[todo] = shapely.buffer(
+                    shapely.linestrings(
+                        np.stack(
+                            [network.node_xy[u[todo]], network.node_xy[v[todo]]], 1
+                        )
+                    ),
+                    EDGE_BUFFER_M,
+                    quad_segs=2,
+                )
+                buffered |= todo
+                reach = shapely.union_all(np.r_[corridors[new], reach])
+                prev = edges
+                rows.append(
+                    {
+                        "id": stations["id"].iloc[pos],
+                        "minutes": budget_min,
+                        "network_version": network.version,
+                        "lat": stations["lat"].iloc[pos],
+                        "lon": stations["lon"].iloc[pos],
+                        "geometry": reach,
+                    }
+                )
+
+    if not rows:
+        return gpd.GeoDataFrame(
+            columns=ISOCHRONE_COLUMNS, geometry="geometry", crs=METRIC_CRS
+        )
+    out = gpd.GeoDataFrame(rows, geometry="geometry", crs=METRIC_CRS)
+    out["id"] = out["id"].astype(stations["id"].dtype)
+    return out
+
+
+def load_isochrones(path=ISOCHRONE_PATH):
+    """Cached isochrones, or an empty frame when nothing is cached yet."""
+    if Path(path).exists():
+        return gpd.read_parquet(path)
+    return gpd.GeoDataFrame(
+        columns=ISOCHRONE_COLUMNS, geometry="geometry", crs=METRIC_CRS
+    )
+
+
+def update_isochrones(
+    stations, network, path=ISOCHRONE_PATH, minutes=ISOCHRONE_MINUTES
+):
+    """
+    Isochrones of `stations` (id, lat, lon) on `network`, recomputing only
+    stations that are new, moved, or missing a budget for this network
+    version. Rows cached for other network versions are kept as they are.
+    Returns the current stations' isochrones.
+    """
+    stations = stations.dropna(subset=["lat", "lon"])[["id", "lat", "lon"]]
+    stations = stations.drop_duplicates("id").reset_index(drop=True)
+    cached = load_isochrones(path)
+
+    current = cached["network_version"] == network.version
+    other_versions = cached[~current]
+    reusable = cached[current & cached["minutes"].isin(minutes)].merge(
+        stations, on=["id", "lat", "lon"]
+    )
+    complete = reusable.groupby("id")["minutes"].nunique() == len(minutes)
+    complete_ids = complete.index[complete]
+
+    reusable = reusable[reusable["id"].isin(complete_ids)]
+    todo = stations[~stations["id"].isin(complete_ids)]
+    computed = station_isochrones(network, todo, minutes)
+    print(f"isochrones: {len(todo)} of {len(stations)} stations computed")
+
+    fresh = pd.concat([reusable, computed], ignore_index=True)
+    fresh["id"] = fresh["id"].astype(stations["id"].dtype)
+    fresh = fresh.sort_values(["id", "minutes"]).reset_index(drop=True)
+    fresh = gpd.GeoDataFrame(fresh, geometry="geometry", crs=METRIC_CRS)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    out = pd.concat([other_versions.to_crs(METRIC_CRS), fresh], ignore_index=True)
+    gpd.GeoDataFrame(out, geometry="geometry", crs=METRIC_CRS)[
+        ISOCHRONE_COLUMNS
+    ].to_parquet(path, index=False)
+    return fresh
+
+
+def within_reach(isochrones, source_xy, weights=None):
+    """Count (or sum of `weights`) of the source points inside each polygon."""
+    source_xy = np.asarray(source_xy, dtype="float64").reshape(-1, 2)
+    tree = shapely.STRtree(shapely.points(source_xy))
+    poly_pos, source_pos = tree.query(
+        isochrones.geometry.to_numpy(), predicate="contains"
+    )
+    weights = np.ones(len(source_xy)) if weights is None else np.asarray(weights)
+    return np.bincount(poly_pos, weights=weights[source_pos], minlength=len(isochrones))
+
+
+def reach_features(isochrones, sources):
+    """
+    One row per station id with `{source}_within_{minutes}min_bike` for each
+    REACH_SOURCES table in `sources` and each isochrone budget.
+    """
+    long = isochrones[["id", "minutes"]].copy()
+    for name, value_col in REACH_SOURCES.items():
+        source = sources[name].dropna(subset=["lat", "lon"])
+        xy = np.column_stack(project_to_metric(source["lat"], source["lon"]))
+        weights = None if value_col is None else source[value_col].to_numpy("float64")
+        long[name] = within_reach(isochrones, xy, weights).round().astype(int)
+
+    wide = long.pivot(index="id", columns="minutes")
+    wide.columns = [f"{name}_within_{m}min_bike" for name, m in wide.columns]
+    return wide.reset_index()
+
+
+def current_station_coords():
+    """id / lat / lon of the current stations, coordinates from coords.csv."""
+    coords = load_artifact("coords", columns=["scoring_name", "lat", "lon"])
+    stations = load_artifact("current_stations", columns=["id", "name"]).merge(
+        coords, left_on="name", right_on="scoring_name", how="left"
+    )
+    return stations[["id", "lat", "lon"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--graphml", default=DEFAULT_GRAPHML)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    network = load_street_network(args.graphml)
+    isochrones = update_isochrones(current_station_coords(), network)
+
+    sources = {name: load_artifact(name) for name in REACH_SOURCES}
+    reach = save_artifact(reach_features(isochrones, sources), "station_reach")
+    print(f"{reach.shape} -> station_reach, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Park polygon loading and STRtree-backed park features: nearest-park distance and park area inside a
+radius, for any batch of metric query points.
+
+Park polygons are indexed once in a Shapely STRtree. Nearest distances use
+`query_nearest`, and area-within-radius only intersects each buffer with the
+parks whose bounding boxes it hits instead of overlaying every park against
+every buffer.
+"""
+
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from projection import METRIC_CRS, project_geometries_to_metric
+
+
+def load_parks(amenities_dir="../../cleaned/amenities/"):
+    """
+    Cleaned park polygons as a GeoDataFrame in EPSG:4326.
+
+    Reads the GeoParquet (WKB) copy written by parks.py; falls back to
+    parsing parks.csv's WKT column when the parquet has not been built.
+    """
+    amenities_dir = Path(amenities_dir)
+    parquet_path = amenities_dir / "parks.parquet"
+    if parquet_path.exists():
+        return gpd.read_parquet(parquet_path)
+
+    parks = pd.read_csv(amenities_dir / "parks.csv")
+    return gpd.GeoDataFrame(
+        parks.drop(columns=["geometry"]),
+        geometry=shapely.from_wkt(parks["geometry"].to_numpy()),
+        crs="EPSG:4326",
+    )
+
+
+class ParkIndex:
+    def __init__(self, park_geoms):
+        self.geoms = np.asarray(park_geoms)
+        shapely.prepare(self.geoms)
+        self.tree = shapely.STRtree(self.geoms)
+
+    @classmethod
+    def from_gdf(cls, parks_gdf, crs=METRIC_CRS):
+        """Build from the EPSG:4326 parks GeoDataFrame, projected to `crs`."""
+        geoms = parks_gdf.geometry.to_numpy()
+        return cls(project_geometries_to_metric(geoms, crs))
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def nearest_distance(self, query_xy):
+        """Distance from each query point to the closest park (0 inside one)."""
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        dists = np.full(len(query_xy), np.nan)
+        if len(self) == 0:
+            return dists
+
+        points = shapely.points(query_xy)
+        (query_pos, _), nearest = self.tree.query_nearest(
+            points, return_distance=True, all_matches=False
+        )
+        dists[query_pos] = nearest
+        return dists
+
+    def area_within(self, query_xy, radius_m):
+        """Total park area (m²) inside a radius_m circle around each point."""
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        if len(self) == 0:
+            return np.zeros(len(query_xy))
+
+        # quad_segs=16 matches GeoSeries.buffer, which the overlay version used
+        buffers = shapely.buffer(shapely.points(query_xy), radius_m, quad_segs=16)
+        query_pos, park_pos = self.tree.query(buffers, predicate="intersects")
+
+        areas = shapely.area(
+            shapely.intersection(buffers[query_pos], self.geoms[park_pos])
+        )
+        return np.bincount(query_pos, weights=areas, minlength=len(query_xy))
@@ -0,0 +1,231 @@
+"""
+Metric projection for station features, plus a shared cache of projected
+point tables.
+
+All feature distances are measured in NAD83 / UTM zone 14N (EPSG:26914),
+which is close to true ground distance around Austin. Web Mercator
+(EPSG:3857) stretches distances by 1 / cos(latitude), about 15% here, so a
+"275 m" buffer in 3857 is really ~240 m on the ground.
+
+Every helper used to rebuild a GeoDataFrame and reproject it with
+`to_crs(...)` on each call, so a source such as transit or retail was
+projected several times per build. The cache projects a dataset once per CRS,
+derives filtered subsets from that projection, and keeps a KD-tree per entry.
+"""
+
+import hashlib
+from functools import cache
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+from spatial_index import PointIndex
+
+METRIC_CRS = "EPSG:26914"
+
+
+@cache
+def get_transformer(crs=METRIC_CRS):
+    return Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+
+
+def project_to_metric(lat, lon, crs=METRIC_CRS):
+    """Project lat/lon arrays to metric x/y arrays in one vectorized call."""
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    return get_transformer(crs).transform(lon, lat)
+
+
+def unproject_from_metric(x, y, crs=METRIC_CRS):
+    """Inverse of `project_to_metric`: metric x/y arrays back to lat/lon arrays."""
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    lon, lat = get_transformer(crs).transform(x, y, direction="INVERSE")
+    return lat, lon
+
+
+def project_geometries_to_metric(geoms, crs=METRIC_CRS):
+    """Project an array of lon/lat Shapely geometries (e.g. park polygons)."""
+    transformer = get_transformer(crs)
+    return shapely.transform(
+        np.asarray(geoms),
+        lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])),
+    )
+
+
+def table_fingerprint(df):
+    """
+    Content hash of a table: its column names and dtypes and every value,
+    so a changed count or population invalidates the cached projection as
+    surely as a moved point.
+    """
+    digest = hashlib.sha1()
+    for col, dtype in df.dtypes.items():
+        digest.update(f"{col}:{dtype};".encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ProjectionCache:
+    """
+    Projected points keyed by (dataset, filter, CRS).
+
+    A dataset is identified by `name` when one is given, otherwise by the hash
+    of its contents. Named entries are rebuilt automatically when any value
+    behind the name changes (the projected frames carry every column, not just
+    the coordinates); `invalidate` drops entries explicitly.
+    A frozen cache skips that check (see `freeze`).
+    """
+
+    def __init__(self, crs=METRIC_CRS):
+        self.crs = crs
+        self.frozen = False
+        self._points = {}
+        self._indexes = {}
+        self._memos = {}
+        self._derived = {}
+        self._fingerprints = {}
+        self.stats = {}
+
+    def freeze(self):
+        """
+        Trust named datasets not to change from now on: lookups by name stop
+        re-hashing the tables, and `derived` entries stop recomputing
+        their fingerprints. For long-running processes that load their
+        sources once, where the hashing would cost more than the queries.
+        `invalidate` still drops entries.
+        """
+        self.frozen = True
+        return self
+
+    def _dataset_key(self, df, name):
+        if self.frozen and name in self._fingerprints:
+            return name
+
+        fingerprint = table_fingerprint(df)
+        if name is None:
+            return f"anon:{fingerprint[:8]}"
+
+        if self._fingerprints.get(name, fingerprint) != fingerprint:
+            self.invalidate(name)
+            self._record(name, "stale")
+        self._fingerprints[name] = fingerprint
+        return name
+
+    def _record(self, dataset_key, event):
+        counts = self.stats.setdefault(
+            dataset_key, {"hits": 0, "misses": 0, "stale": 0}
+        )
+        counts[event] += 1
+
+    def points(
+        self,
+        df,
+        lat_col="lat",
+        lon_col="lon",
+        crs=None,
+        filter_col=None,
+        filter_values=None,
+        name=None,
+    ):
+        """
+        Projected GeoDataFrame for `df`, optionally filtered on
+        `filter_col.isin(filter_values)`. Treat the result as read-only.
+        """
+        crs = crs or self.crs
+        dataset_key = self._dataset_key(df, name)
+
+        filter_key = None
+        if filter_col is not None and filter_values is not None:
+            filter_key = (filter_col, frozenset(filter_values))
+
+        key = (dataset_key, lat_col, lon_col, filter_key, str(crs))
+        if key in self._points:
+            self._record(dataset_key, "hits")
+            return self._points[key]
+
+        self._record(dataset_key, "misses")
+
+        full_key = (dataset_key, lat_col, lon_col, None, str(crs))
+        if full_key not in self._points:
+            out = df.dropna(subset=[lat_col, lon_col]).copy()
+            x, y = project_to_metric(out[lat_col], out[lon_col], crs)
+            self._points[full_key] = gpd.GeoDataFrame(
+                out, geometry=gpd.points_from_xy(x, y), crs=crs
+            )
+
+        if filter_key is not None:
+            full = self._points[full_key]
+            self._points[key] = full[full[filter_col].isin(filter_values)]
+
+        return self._points[key]
+
+    def index(self, df, **kwargs):
+        """KD-tree over the projected points returned by `points(df, **kwargs)`."""
+        gdf = self.points(df, **kwargs)
+        key = id(gdf)
+        if key not in self._indexes:
+            self._indexes[key] = (gdf, PointIndex.from_gdf(gdf))
+        return self._indexes[key][1]
+
+    def memo(self, df, key, build, **kwargs):
+        """
+        `build(gdf)` for the projected points returned by `points(df, **kwargs)`,
+        computed once per projection and `key` (e.g. a value matrix or a row
+        mask that would otherwise be rebuilt from the GeoDataFrame per query).
+        """
+        gdf = self.points(df, **kwargs)
+        memos = self._memos.setdefault(id(gdf), (gdf, {}))[1]
+        if key not in memos:
+            memos[key] = build(gdf)
+        return memos[key]
+
+    def derived(self, name, fingerprint, build):
+        """
+        Cache a structure derived from dataset `name` (e.g. a polygon index),
+        calling `build()` again only when `fingerprint` changes. `fingerprint`
+        may be a callable, which a frozen cache does not call once `name` has
+        an entry.
+        """
+        entry = self._derived.get(name)
+        if entry is not None and self.frozen:
+            self._record(name, "hits")
+            return entry[1]
+
+        if callable(fingerprint):
+            fingerprint = fingerprint()
+        if entry is not None and entry[0] == fingerprint:
+            self._record(name, "hits")
+            return entry[1]
+
+        self._record(name, "misses" if entry is None else "stale")
+        value = build()
+        self._derived[name] = (fingerprint, value)
+        return value
+
+    def invalidate(self, name=None):
+        """Drop every cached entry, or only the entries of dataset `name`."""
+        if name is None:
+            dropped = list(self._points)
+            self._fingerprints.clear()
+            self._derived.clear()
+        else:
+            dropped = [key for key in self._points if key[0] == name]
+            self._fingerprints.pop(name, None)
+            self._derived.pop(name, None)
+
+        for key in dropped:
+            gdf = self._points.pop(key)
+            self._indexes.pop(id(gdf), None)
+            self._memos.pop(id(gdf), None)
+
+    def summary(self):
+        """Per-dataset hit / miss counts as a DataFrame."""
+        summary = pd.DataFrame.from_dict(self.stats, orient="index")
+        summary.index.name = "dataset"
+        return summary.reindex(columns=["hits", "misses", "stale"]).fillna(0)
+
+
+projection_cache = ProjectionCache()
@@ -0,0 +1,148 @@
+# %% [markdown]
+# # Station features: baseline vs now
+# Diffs the v5 station features built by the current code against the
+# combined_dataset_v5.csv committed at the baseline, and splits every change
+# by cause. The current code is run twice, in EPSG:3857 (the baseline's CRS)
+# and in UTM 14N:
+#
+#   - baseline -> current code in EPSG:3857: code changes at a fixed CRS,
+#     i.e. the park helpers fix (the baseline's nearest-park distances were
+#     ~3.4e6 m and its park areas zero) and user-002's exact-circle buffers
+#   - EPSG:3857 -> UTM 14N: the CRS change alone
+
+# %%
+import io
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+from park_features import load_parks
+from projection import METRIC_CRS, ProjectionCache
+from pyproj import Proj
+from station_features import build_station_features
+
+sys.path.append("..")
+from artifacts import load_artifact
+
+pd.set_option("display.max_rows", 100)
+pd.set_option("display.width", 200)
+pd.set_option("display.max_columns", 20)
+
+BASELINE_COMMIT = "d4341ae"
+BASELINE_PATH = "data/cleaned/combined_datasets/v5/combined_dataset_v5.csv"
+
+PARK_COLS = ["park_area_nearby", "nearest_park_dist_m"]
+
+# %%
+cleaned_prefix = "../../cleaned/"
+
+sources = {
+    name: load_artifact(name)
+    for name in [
+        "transit",
+        "jobs",
+        "housing",
+        "amenities",
+        "retail",
+        "dining_halls",
+        "dorms",
+        "ut_hotspots",
+        "wampus_hotspots",
+    ]
+}
+sources["parks"] = load_parks(cleaned_prefix + "amenities/")
+
+stations = (
+    load_artifact("current_stations")
+    .merge(
+        load_artifact("coords")[["scoring_name", "lat", "lon"]],
+        left_on="name",
+        right_on="scoring_name",
+        how="left",
+    )
+    .dropna(subset=["lat", "lon"])
+)
+
+# %%
+baseline_csv = subprocess.run(
+    ["git", "show", f"{BASELINE_COMMIT}:{BASELINE_PATH}"],
+    capture_output=True,
+    text=True,
+    check=True,
+).stdout
+base = pd.read_csv(io.StringIO(baseline_csv)).set_index("id").sort_index()
+
+merc = build_station_features(stations, sources, cache=ProjectionCache("EPSG:3857"))
+utm = build_station_features(stations, sources, cache=ProjectionCache(METRIC_CRS))
+merc = merc.set_index("id").loc[base.index]
+utm = utm.set_index("id").loc[base.index]
+
+feature_cols = [
+    col
+    for col in base.columns
+    if col in utm.columns and col not in stations.columns and col != "name"
+]
+
+
+def changed(a, b):
+    """Stations whose value moved, and the largest absolute move."""
+    diff = (b[feature_cols].astype("float64") - a[feature_cols].astype("float64")).abs()
+    return (diff > 1e-6).sum(), diff.max()
+
+
+code_n, code_max = changed(base, merc)
+crs_n, crs_max = changed(merc, utm)
+code_cols = code_n.index[code_n > 0]
+
+# %%
+# Park helpers fix: the baseline values were not distances / areas at all
+park = pd.DataFrame(
+    {
+        "stations_changed": code_n[PARK_COLS],
+        "baseline_median": base[PARK_COLS].median(),
+        "fixed_median_3857": merc[PARK_COLS].median(),
+        "fixed_median_utm": utm[PARK_COLS].median(),
+    }
+)
+print("Park fix\n", park, "\n")
+
+# user-002: exact circles instead of 64-segment buffer polygons add or drop
+# the odd source point on a buffer's edge
+circles = pd.DataFrame({"stations_changed": code_n, "max_abs_diff": code_max}).loc[
+    code_cols.difference(PARK_COLS)
+]
+print("Exact circles (user-002)\n", circles, "\n")
+
+# CRS change: distances scale by the ratio of the two projections' scale
+# factors; counts / sums move with them
+rel = (utm[feature_cols] / merc[feature_cols].where(merc[feature_cols] != 0)).median()
+crs = (
+    pd.DataFrame(
+        {"stations_changed": crs_n, "max_abs_diff": crs_max, "median_ratio": rel}
+    )
+    .loc[crs_n.index[crs_n > 0]]
+    .sort_values(["stations_changed", "max_abs_diff"], ascending=False)
+)
+print("EPSG:3857 -> UTM 14N\n", crs)
+
+# %%
+# At a fixed CRS only the park columns and buffer aggregates may change
+buffer_cols = [col for col in feature_cols if "nearby" in col or "within" in col]
+unexpected = code_cols.difference(PARK_COLS + buffer_cols)
+assert unexpected.empty, (
+    f"code changes outside park / buffer columns: {list(unexpected)}"
+)
+
+# A distance measured in both CRSs scales by k_utm / k_mercator at the
+# station; beyond 1% off, the nearest neighbour itself changed for most
+# stations
+lon, lat = stations.set_index("id").loc[base.index, ["lon", "lat"]].to_numpy().T
+expected = np.median(
+    Proj(METRIC_CRS).get_factors(lon, lat).meridional_scale
+    / Proj("EPSG:3857").get_factors(lon, lat).meridional_scale
+)
+dist_cols = [col for col in crs.index if "dist" in col]
+off = (crs.loc[dist_cols, "median_ratio"] / expected - 1).abs()
+print(f"\nexpected distance ratio {expected:.4f}")
+assert (off < 0.01).all(), crs.loc[off.index[off >= 0.01]]
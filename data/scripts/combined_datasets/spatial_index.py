@@ -0,0 +1,108 @@
+"""
+KD-tree backed nearest-neighbour queries over projected point coordinates.
+
+All queries take an (n, 2) array of query coordinates in the same metric CRS
+as the indexed points and answer for every query point in one vectorized call.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def points_xy(gdf):
+    """(n, 2) float64 array of x/y coordinates for a GeoDataFrame of points."""
+    return np.column_stack(
+        [
+            gdf.geometry.x.to_numpy(dtype="float64"),
+            gdf.geometry.y.to_numpy(dtype="float64"),
+        ]
+    )
+
+
+class PointIndex:
+    def __init__(self, xy):
+        self.xy = np.asarray(xy, dtype="float64").reshape(-1, 2)
+        self.tree = cKDTree(self.xy) if len(self.xy) else None
+
+    @classmethod
+    def from_gdf(cls, gdf):
+        return cls(points_xy(gdf))
+
+    def __len__(self):
+        return len(self.xy)
+
+    def nearest(self, query_xy):
+        """
+        Distance to and position of the nearest indexed point for each query.
+        Returns NaN distances and -1 positions when the index is empty.
+        """
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        if self.tree is None:
+            return np.full(len(query_xy), np.nan), np.full(len(query_xy), -1)
+
+        dists, idx = self.tree.query(query_xy, k=1)
+        return dists, idx
+
+    def k_nearest(self, query_xy, k):
+        """
+        Sorted distances / positions of the k nearest indexed points, shape
+        (n, min(k, len(index))).
+        """
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        k = min(k, len(self))
+        if k == 0:
+            empty = np.empty((len(query_xy), 0))
+            return empty, empty.astype(int)
+
+        dists, idx = self.tree.query(query_xy, k=k)
+        return dists.reshape(len(query_xy), k), idx.reshape(len(query_xy), k)
+
+    def avg_k_nearest(self, query_xy, k):
+        """Mean distance to the k nearest indexed points (NaN when empty)."""
+        dists, _ = self.k_nearest(query_xy, k)
+        if dists.shape[1] == 0:
+            return np.full(len(dists), np.nan)
+        return dists.mean(axis=1)
+
+    def within(self, query_xy, radius_m):
+        """Positions of the indexed points within radius_m of each query point."""
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        if self.tree is None:
+            return [np.empty(0, dtype=int) for _ in range(len(query_xy))]
+
+        return [
+            np.asarray(hits, dtype=int)
+            for hits in self.tree.query_ball_point(query_xy, r=radius_m)
+        ]
+
+    def pairs_within(self, query_xy, radius_m):
+        """
+        Flattened (query position, indexed position, distance) arrays for every
+        indexed point within radius_m of a query point, in no particular order.
+
+        The pairs come from a dual-tree search against a KD-tree of the query
+        points, which returns flat arrays instead of one list per query.
+        """
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        if self.tree is None or len(query_xy) == 0:
+            empty = np.empty(0, dtype=int)
+            return empty, empty.copy(), np.empty(0)
+
+        pairs = cKDTree(query_xy).sparse_distance_matrix(
+            self.tree, radius_m, output_type="ndarray"
+        )
+        query_pos = pairs["i"].astype(int)
+        index_pos = pairs["j"].astype(int)
+        dists = np.hypot(*(self.xy[index_pos] - query_xy[query_pos]).T)
+        return query_pos, index_pos, dists
+
+    def count_within(self, query_xy, radius_m):
+        """Number of indexed points within radius_m of each query point."""
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        if self.tree is None:
+            return np.zeros(len(query_xy), dtype=int)
+
+        return np.asarray(
+            self.tree.query_ball_point(query_xy, r=radius_m, return_length=True),
+            dtype=int,
+        )
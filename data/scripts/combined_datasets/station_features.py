@@ -0,0 +1,699 @@
+"""
+Station features shared by the combined dataset builds and candidate scoring.
+
+`compute_station_features` produces the v5 location features for any batch
+of (lat, lon) points: existing stations, projected stations or a grid of
+candidate sites. Every helper below takes an (n, 2) array of metric query
+coordinates and returns plain arrays, so nothing is keyed on rubric `id`.
+Source tables are projected and indexed once through a shared
+`ProjectionCache`, however many helpers and chunks use them.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+import shapely
+from park_features import ParkIndex
+from projection import project_to_metric, projection_cache
+from scipy import sparse
+from spatial_index import points_xy
+from station_network import station_network_features
+
+# Retail `type` values counted as entertainment / tourism
+ENTERTAINMENT_TYPES = {
+    "amenity_bar",
+    "amenity_cafe",
+    "amenity_restaurant",
+    "amenity_pub",
+    "amenity_theatre",
+    "amenity_cinema",
+    "amenity_nightclub",
+}
+
+TOURISM_TYPES = {
+    "tourism_attraction",
+    "tourism_museum",
+    "tourism_gallery",
+    "tourism_viewpoint",
+}
+
+# LODES WAC segment columns in the jobs table (age, earnings, industry) and
+# the radii they are summed over, as jobs_{segment}_{radius}m
+JOB_SEGMENT_PATTERN = re.compile(r"^(ca|ce|cns)\d{2}$")
+JOB_SEGMENT_RADII = (275, 500, 1000)
+
+# Street-network versions of the straight-line features, added when
+# `compute_station_features` is given a StreetNetwork
+NETWORK_FEATURE_COLUMNS = [
+    "transit_nearby_net",
+    "nearest_transit_stop_net_dist_m",
+    "jobs_nearby_275m_net",
+    "housing_nearby_275m_net",
+    "housing_nearby_1000m_net",
+    "amenities_nearby_net",
+    "nearest_amenity_net_dist_m",
+    "retail_nearby_net",
+    "nearest_retail_net_dist_m",
+    "nearest_dining_hall_net_dist_m",
+]
+
+# Adjust coords if you want a different proxy center
+WEST_CAMPUS_CENTER = (30.2885, -97.7475)
+
+
+# v5 features computed from a point's location, in combined_dataset_v5 order
+STATION_FEATURE_COLUMNS = [
+    # transit
+    "transit_nearby",
+    "nearest_transit_stop_dist_m",
+    "avg_dist_3_nearest_transit_stops_m",
+    # jobs / housing
+    "jobs_nearby_275m",
+    "housing_nearby_275m",
+    "housing_nearby_1000m",
+    "job_housing_ratio_275m",
+    # amenities / parks / retail
+    "amenities_nearby",
+    "avg_dist_3_nearest_amenities_m",
+    "park_area_nearby",
+    "nearest_park_dist_m",
+    "retail_nearby",
+    "avg_dist_3_nearest_retail_m",
+    "entertainment_nearby",
+    "avg_dist_3_nearest_entertainment_m",
+    "tourism_nearby",
+    "avg_dist_3_nearest_tourism_m",
+    # bikeshare network
+    "nearest_station_dist_m",
+    "stations_within_500m",
+    "stations_within_1000m",
+    "avg_stations_dist_3_nearest_m",
+    # campus-specific
+    "nearest_dining_hall_dist_m",
+    "nearest_dorm_dist_m",
+    "nearest_dorm_pop",
+    "dorm_pop_within_500m",
+    "min_dist_to_ut_hotspot_m",
+    "avg_dist_3_nearest_ut_hotspot_m",
+    "ut_hotspot_within_300m",
+    "ut_hotspot_within_500m",
+    "min_dist_to_wampus_hotspot_m",
+    "avg_dist_3_nearest_wampus_hotspot_m",
+    "wampus_hotspot_within_300m",
+    "wampus_hotspot_within_500m",
+    "dist_to_west_campus_center_m",
+    # interactions
+    "ut_x_dorm_pop_500m",
+    "ut_x_dining_dist",
+    "ut_x_transit",
+    "ut_x_housing_275m",
+    "ut_x_ut_hotspots_300m",
+    "ut_x_wampus_hotspots_300m",
+]
+
+
+def job_segment_columns(jobs_df, radii=JOB_SEGMENT_RADII):
+    """
+    (segment columns present in the jobs table, feature columns they produce).
+    Both are empty for a jobs table built before the segments were kept.
+    """
+    segments = [col for col in jobs_df.columns if JOB_SEGMENT_PATTERN.match(col)]
+    features = [f"jobs_{seg}_{r}m" for r in radii for seg in segments]
+    return segments, features
+
+
+def buffer_features(
+    query_xy,
+    source_df,
+    specs,
+    source_lat_col="lat",
+    source_lon_col="lon",
+    source_name=None,
+    cache=projection_cache,
+):
+    """
+    Compute several buffer aggregates of one source table in a single pass.
+
+    Each spec is a dict with:
+      - out_col: output column name
+      - buffer_m: radius in meters
+      - agg: "count" (default) or "sum"
+      - value_col: column summed when agg == "sum"
+      - value_cols / out_cols: several columns summed at once instead
+      - filter_col / filter_values: optional subset of the source rows
+
+    One radius query at the largest buffer is made per source. Counts are a
+    masked bincount over those query/source pairs; sums are one sparse
+    (query x source) within-buffer matrix times the (source x column) value
+    matrix, so summing 26 job segments costs about as much as summing one.
+    """
+    source_kwargs = {"lat_col": source_lat_col, "lon_col": source_lon_col}
+    source_gdf = cache.points(source_df, name=source_name, **source_kwargs)
+    source_index = cache.index(source_df, name=source_name, **source_kwargs)
+
+    max_buffer_m = max(spec["buffer_m"] for spec in specs)
+    query_pos, source_pos, dists = source_index.pairs_within(query_xy, max_buffer_m)
+
+    n_query = len(query_xy)
+    features = {}
+    for spec in specs:
+        out_col = spec.get("out_col")
+        agg = spec.get("agg", "count")
+
+        mask = dists <= spec["buffer_m"]
+        if spec.get("filter_col") is not None and spec.get("filter_values") is not None:
+            filter_col, filter_values = spec["filter_col"], spec["filter_values"]
+            keep = cache.memo(
+                source_df,
+                ("isin", filter_col, frozenset(filter_values)),
+                lambda gdf, col=filter_col, values=filter_values: (
+                    gdf[col].isin(values).to_numpy()
+                ),
+                name=source_name,
+                **source_kwargs,
+            )
+            mask &= keep[source_pos]
+
+        if agg == "count":
+            features[out_col] = np.bincount(query_pos[mask], minlength=n_query).astype(
+                int
+            )
+        elif agg == "sum":
+            value_cols = spec.get("value_cols", [spec.get("value_col")])
+            out_cols = spec.get("out_cols", [out_col])
+            within = sparse.csr_matrix(
+                (np.ones(mask.sum()), (query_pos[mask], source_pos[mask])),
+                shape=(n_query, len(source_gdf)),
+            )
+            values, is_integer = cache.memo(
+                source_df,
+                ("values", tuple(value_cols)),
+                lambda gdf, cols=value_cols: (
+                    gdf[cols].to_numpy(dtype="float64"),
+                    [pd.api.types.is_integer_dtype(gdf[col]) for col in cols],
+                ),
+                name=source_name,
+                **source_kwargs,
+            )
+            sums = within @ values
+            for col, col_is_integer, col_sums in zip(out_cols, is_integer, sums.T):
+                if col_is_integer:
+                    col_sums = col_sums.round().astype(int)
+                features[col] = col_sums
+        else:
+            raise ValueError(f"Unknown buffer aggregate: {agg!r}")
+
+    return features
+
+
+def nearest_distance(
+    query_xy,
+    source_df,
+    source_lat_col="lat",
+    source_lon_col="lon",
+    source_filter_col=None,
+    source_filter_values=None,
+    source_name=None,
+    cache=projection_cache,
+):
+    """Distance to the nearest source row (NaN when the source is empty)."""
+    source_index = cache.index(
+        source_df,
+        lat_col=source_lat_col,
+        lon_col=source_lon_col,
+        filter_col=source_filter_col,
+        filter_values=source_filter_values,
+        name=source_name,
+    )
+    return source_index.nearest(query_xy)[0].round(2)
+
+
+def avg_k_nearest_distance(
+    query_xy,
+    source_df,
+    k=3,
+    source_lat_col="lat",
+    source_lon_col="lon",
+    source_filter_col=None,
+    source_filter_values=None,
+    source_name=None,
+    cache=projection_cache,
+):
+    """Mean distance to the k nearest source rows (NaN when the source is empty)."""
+    source_index = cache.index(
+        source_df,
+        lat_col=source_lat_col,
+        lon_col=source_lon_col,
+        filter_col=source_filter_col,
+        filter_values=source_filter_values,
+        name=source_name,
+    )
+    return source_index.avg_k_nearest(query_xy, k).round(2)
+
+
+def nearest_and_avg_k(source_index, query_xy, k=3):
+    """
+    nearest / avg_k_nearest distances from one k-nearest query (NaN when the
+    source is empty).
+    """
+    dists, _ = source_index.k_nearest(query_xy, k)
+    if dists.shape[1] == 0:
+        empty = np.full(len(query_xy), np.nan)
+        return empty, empty.copy()
+    return dists[:, 0].round(2), dists.mean(axis=1).round(2)
+
+
+def nearest_dorm_info(query_xy, dorms_df, cache=projection_cache):
+    dorms_gdf = cache.points(dorms_df, name="dorms")
+
+    if dorms_gdf.empty:
+        empty = np.full(len(query_xy), np.nan)
+        return {"nearest_dorm_dist_m": empty, "nearest_dorm_pop": empty.copy()}
+
+    dorm_index = cache.index(dorms_df, name="dorms")
+    dists, nearest_pos = dorm_index.nearest(query_xy)
+    population = dorms_gdf["population"].to_numpy(dtype="float64")
+
+    return {
+        "nearest_dorm_dist_m": dists.round(2),
+        "nearest_dorm_pop": population[nearest_pos],
+    }
+
+
+def network_features(query_xy, stations_df, cache=projection_cache):
+    """
+    Bikeshare network features against the stations in `stations_df`.
+    A station at distance 0 from a query point (itself) is not counted.
+    """
+    station_index = cache.index(stations_df, name="stations")
+    metrics = station_network_features(station_index.xy, query_xy)
+
+    features = {col: metrics[col].to_numpy() for col in metrics.columns}
+    for col in ["nearest_station_dist_m", "avg_stations_dist_3_nearest_m"]:
+        features[col] = features[col].round(2)
+    return features
+
+
+def park_fingerprint(parks_gdf):
+    """Content hash of the park geometries, the key of the cached park index."""
+    wkb = shapely.to_wkb(parks_gdf.geometry.to_numpy())
+    return hashlib.sha1(b"".join(wkb)).hexdigest()
+
+
+def get_park_index(parks_gdf, cache):
+    return cache.derived(
+        "parks",
+        lambda: park_fingerprint(parks_gdf),
+        lambda: ParkIndex.from_gdf(parks_gdf, cache.crs),
+    )
+
+
+def park_features(query_xy, parks_gdf, buffer_m=275, cache=projection_cache):
+    park_index = get_park_index(parks_gdf, cache)
+
+    park_area = park_index.area_within(query_xy, buffer_m)
+    return {
+        "park_area_nearby": np.nan_to_num(park_area).round().astype(int),
+        "nearest_park_dist_m": park_index.nearest_distance(query_xy).round(2),
+    }
+
+
+def manual_point_distance(query_xy, point_lat, point_lon, cache=projection_cache):
+    target_x, target_y = project_to_metric(point_lat, point_lon, cache.crs)
+    dists = np.hypot(query_xy[:, 0] - target_x, query_xy[:, 1] - target_y)
+    return dists.round(2)
+
+
+def hotspot_summary_features(
+    query_xy,
+    source_df,
+    prefix,
+    buffer_m_list=(300, 500),
+    k=3,
+    source_lat_col="lat",
+    source_lon_col="lon",
+    cache=projection_cache,
+):
+    source_kwargs = {
+        "lat_col": source_lat_col,
+        "lon_col": source_lon_col,
+        "name": prefix,
+    }
+    source_index = cache.index(source_df, **source_kwargs)
+
+    nearest, avg_k = nearest_and_avg_k(source_index, query_xy, k)
+    features = {
+        f"min_dist_to_{prefix}_m": nearest,
+        f"avg_dist_{k}_nearest_{prefix}_m": avg_k,
+    }
+    for buf in buffer_m_list:
+        features[f"{prefix}_within_{buf}m"] = source_index.count_within(
+            query_xy, buf
+        ).astype(int)
+
+    return features
+
+
+def street_network_features(query_xy, sources, network, cache=projection_cache):
+    """
+    NETWORK_FEATURE_COLUMNS along `network` (a StreetNetwork): one Dijkstra
+    pass per nearest-distance source, and one radius-limited pass per query
+    node shared by every count / sum.
+    """
+
+    def source_xy(name):
+        return points_xy(cache.points(sources[name], name=name))
+
+    def weights(name, col):
+        return cache.points(sources[name], name=name)[col].to_numpy(dtype="float64")
+
+    reach = network.reach(
+        query_xy,
+        {
+            "transit": (source_xy("transit"), None),
+            "jobs": (source_xy("jobs"), weights("jobs", "job_count")),
+            "housing": (source_xy("housing"), weights("housing", "count")),
+            "amenities": (source_xy("amenities"), None),
+            "retail": (source_xy("retail"), None),
+        },
+        radii_m=(275, 1000),
+    )
+
+    features = {
+        "transit_nearby_net": reach[("transit", 275)],
+        "jobs_nearby_275m_net": reach[("jobs", 275)],
+        "housing_nearby_275m_net": reach[("housing", 275)],
+        "housing_nearby_1000m_net": reach[("housing", 1000)],
+        "amenities_nearby_net": reach[("amenities", 275)],
+        "retail_nearby_net": reach[("retail", 275)],
+    }
+    features = {col: values.round().astype(int) for col, values in features.items()}
+
+    for col, name in [
+        ("nearest_transit_stop_net_dist_m", "transit"),
+        ("nearest_amenity_net_dist_m", "amenities"),
+        ("nearest_retail_net_dist_m", "retail"),
+        ("nearest_dining_hall_net_dist_m", "dining_halls"),
+    ]:
+        features[col] = network.nearest_distance(query_xy, source_xy(name)).round(2)
+    return features
+
+
+def point_features(query_xy, is_ut, sources, cache=projection_cache, network=None):
+    """
+    The STATION_FEATURE_COLUMNS frame for one batch of metric query points,
+    plus jobs_{segment}_{radius}m columns when the jobs table has WAC segments
+    and NETWORK_FEATURE_COLUMNS when a StreetNetwork is given.
+
+    `sources` maps dataset names to the cleaned tables: stations (the current
+    network), transit, jobs, housing, amenities, parks, retail, dining_halls,
+    dorms, ut_hotspots and wampus_hotspots.
+    """
+    features = {}
+
+    # -----------------------------
+    # Transit
+    # -----------------------------
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["transit"],
+            source_name="transit",
+            specs=[{"out_col": "transit_nearby", "buffer_m": 275}],
+            cache=cache,
+        )
+    )
+    transit_index = cache.index(sources["transit"], name="transit")
+    nearest, avg_3 = nearest_and_avg_k(transit_index, query_xy, k=3)
+    features["nearest_transit_stop_dist_m"] = nearest
+    features["avg_dist_3_nearest_transit_stops_m"] = avg_3
+
+    # -----------------------------
+    # Jobs + housing
+    # -----------------------------
+    segments, _ = job_segment_columns(sources["jobs"])
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["jobs"],
+            source_name="jobs",
+            specs=[
+                {
+                    "out_col": "jobs_nearby_275m",
+                    "buffer_m": 275,
+                    "agg": "sum",
+                    "value_col": "job_count",
+                },
+            ]
+            + [
+                {
+                    "out_cols": [f"jobs_{seg}_{r}m" for seg in segments],
+                    "buffer_m": r,
+                    "agg": "sum",
+                    "value_cols": segments,
+                }
+                for r in JOB_SEGMENT_RADII
+                if segments
+            ],
+            cache=cache,
+        )
+    )
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["housing"],
+            source_name="housing",
+            specs=[
+                {
+                    "out_col": "housing_nearby_275m",
+                    "buffer_m": 275,
+                    "agg": "sum",
+                    "value_col": "count",
+                },
+                {
+                    "out_col": "housing_nearby_1000m",
+                    "buffer_m": 1000,
+                    "agg": "sum",
+                    "value_col": "count",
+                },
+            ],
+            cache=cache,
+        )
+    )
+
+    jobs = features["jobs_nearby_275m"]
+    housing = features["housing_nearby_275m"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(housing > 0, jobs / housing, jobs).astype("float64")
+    features["job_housing_ratio_275m"] = np.where(np.isfinite(ratio), ratio, 0.0)
+
+    # -----------------------------
+    # Amenities
+    # -----------------------------
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["amenities"],
+            source_name="amenities",
+            specs=[{"out_col": "amenities_nearby", "buffer_m": 275}],
+            cache=cache,
+        )
+    )
+    features["avg_dist_3_nearest_amenities_m"] = avg_k_nearest_distance(
+        query_xy, sources["amenities"], k=3, source_name="amenities", cache=cache
+    )
+
+    # -----------------------------
+    # Parks
+    # -----------------------------
+    features.update(park_features(query_xy, sources["parks"], 275, cache=cache))
+
+    # -----------------------------
+    # Retail / entertainment / tourism
+    # -----------------------------
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["retail"],
+            source_name="retail",
+            specs=[
+                {"out_col": "retail_nearby", "buffer_m": 275},
+                {
+                    "out_col": "entertainment_nearby",
+                    "buffer_m": 275,
+                    "filter_col": "type",
+                    "filter_values": ENTERTAINMENT_TYPES,
+                },
+                {
+                    "out_col": "tourism_nearby",
+                    "buffer_m": 275,
+                    "filter_col": "type",
+                    "filter_values": TOURISM_TYPES,
+                },
+            ],
+            cache=cache,
+        )
+    )
+    for out_col, filter_values in [
+        ("avg_dist_3_nearest_retail_m", None),
+        ("avg_dist_3_nearest_entertainment_m", ENTERTAINMENT_TYPES),
+        ("avg_dist_3_nearest_tourism_m", TOURISM_TYPES),
+    ]:
+        features[out_col] = avg_k_nearest_distance(
+            query_xy,
+            sources["retail"],
+            k=3,
+            source_name="retail",
+            source_filter_col="type" if filter_values else None,
+            source_filter_values=filter_values,
+            cache=cache,
+        )
+
+    # -----------------------------
+    # Station network
+    # -----------------------------
+    features.update(network_features(query_xy, sources["stations"], cache=cache))
+
+    # -----------------------------
+    # Dining halls + dorms
+    # -----------------------------
+    features["nearest_dining_hall_dist_m"] = nearest_distance(
+        query_xy, sources["dining_halls"], source_name="dining_halls", cache=cache
+    )
+    features.update(nearest_dorm_info(query_xy, sources["dorms"], cache=cache))
+    features.update(
+        buffer_features(
+            query_xy,
+            sources["dorms"],
+            source_name="dorms",
+            specs=[
+                {
+                    "out_col": "dorm_pop_within_500m",
+                    "buffer_m": 500,
+                    "agg": "sum",
+                    "value_col": "population",
+                },
+            ],
+            cache=cache,
+        )
+    )
+
+    # -----------------------------
+    # UT + West Campus hotspots
+    # -----------------------------
+    for prefix in ["ut_hotspot", "wampus_hotspot"]:
+        features.update(
+            hotspot_summary_features(
+                query_xy,
+                sources[f"{prefix}s"],
+                prefix=prefix,
+                buffer_m_list=(300, 500),
+                k=3,
+                cache=cache,
+            )
+        )
+
+    features["dist_to_west_campus_center_m"] = manual_point_distance(
+        query_xy, WEST_CAMPUS_CENTER[0], WEST_CAMPUS_CENTER[1], cache=cache
+    )
+
+    # -----------------------------
+    # UT interaction features
+    # -----------------------------
+    features["ut_x_dorm_pop_500m"] = is_ut * features["dorm_pop_within_500m"]
+    features["ut_x_dining_dist"] = is_ut * features["nearest_dining_hall_dist_m"]
+    features["ut_x_transit"] = is_ut * features["transit_nearby"]
+    features["ut_x_housing_275m"] = is_ut * features["housing_nearby_275m"]
+    features["ut_x_ut_hotspots_300m"] = is_ut * features["ut_hotspot_within_300m"]
+    features["ut_x_wampus_hotspots_300m"] = (
+        is_ut * features["wampus_hotspot_within_300m"]
+    )
+
+    columns = STATION_FEATURE_COLUMNS + job_segment_columns(sources["jobs"])[1]
+
+    # -----------------------------
+    # Street-network distances (opt-in)
+    # -----------------------------
+    if network is not None:
+        features.update(street_network_features(query_xy, sources, network, cache))
+        columns += NETWORK_FEATURE_COLUMNS
+
+    return pd.DataFrame(features)[columns]
+
+
+def compute_station_features(
+    points,
+    sources,
+    is_ut=0,
+    chunk_size=100_000,
+    cache=projection_cache,
+    network=None,
+):
+    """
+    v5 location features for any batch of points.
+
+    `points` is a DataFrame with `lat` / `lon` columns or an (n, 2) array of
+    (lat, lon) rows; `is_ut` is a scalar or per-point flag used by the UT
+    interaction features. `sources` is as for `point_features` and must
+    include `stations`, the network the points are measured against.
+
+    Points are projected in one call and featurized `chunk_size` at a time,
+    so memory stays bounded for large candidate grids. Returns `lat`, `lon`,
+    `is_ut` plus the `point_features` columns, one row per point in input order.
+    The rubric-only v5 columns (docks, scores, ebs_station) are not derived
+    from location and are left to the caller. Passing a StreetNetwork as
+    `network` adds the NETWORK_FEATURE_COLUMNS.
+    """
+    if isinstance(points, pd.DataFrame):
+        lat = points["lat"].to_numpy(dtype="float64")
+        lon = points["lon"].to_numpy(dtype="float64")
+    else:
+        points = np.asarray(points, dtype="float64").reshape(-1, 2)
+        lat, lon = points[:, 0], points[:, 1]
+
+    if not (np.isfinite(lat).all() and np.isfinite(lon).all()):
+        raise ValueError("points must have finite lat / lon values")
+
+    is_ut = np.broadcast_to(np.asarray(is_ut).astype(int), lat.shape)
+    query_xy = np.column_stack(project_to_metric(lat, lon, cache.crs))
+
+    chunks = [
+        point_features(
+            query_xy[start : start + chunk_size],
+            is_ut[start : start + chunk_size],
+            sources,
+            cache=cache,
+            network=network,
+        )
+        for start in range(0, len(query_xy), chunk_size)
+    ]
+    if chunks:
+        features = pd.concat(chunks, ignore_index=True)
+    else:
+        features = point_features(query_xy, is_ut, sources, cache, network)
+
+    features.insert(0, "is_ut", is_ut)
+    features.insert(0, "lon", lon)
+    features.insert(0, "lat", lat)
+    return features
+
+
+def build_station_features(base_df, sources, cache=projection_cache, network=None):
+    """
+    Add the full v5 feature set to a station table with `lat`, `lon` and
+    `is_ut` columns, measuring the network features against the table itself.
+    """
+    features = compute_station_features(
+        base_df,
+        {**sources, "stations": base_df},
+        is_ut=base_df["is_ut"].to_numpy(),
+        cache=cache,
+        network=network,
+    )
+
+    out = base_df.copy()
+    for col in features.columns.drop(["lat", "lon", "is_ut"]):
+        out[col] = features[col].to_numpy()
+    return out
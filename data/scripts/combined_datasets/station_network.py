@@ -0,0 +1,52 @@
+"""
+Bikeshare network features: how close a station (or candidate site) is to
+the rest of the station network.
+
+Everything is answered with KD-tree k-nearest and range-count queries, so no
+n x n distance matrix is built and the same call works for the ~80 current
+stations or for 50k+ candidate points measured against them.
+"""
+
+import numpy as np
+import pandas as pd
+from spatial_index import PointIndex
+
+
+def station_network_features(station_xy, query_xy=None, k=3, radii_m=(500, 1000)):
+    """
+    Network features for each query point against the stations in
+    `station_xy` (both (n, 2) metric coordinate arrays). Queries default to
+    the stations themselves.
+
+    Points at distance 0 from a query (the station itself, or a duplicate
+    kiosk at the same spot) are not counted as neighbours.
+
+    Returns a DataFrame with nearest_station_dist_m,
+    stations_within_{r}m for each radius, and
+    avg_stations_dist_{k}_nearest_m (NaN when fewer than k neighbours).
+    """
+    index = PointIndex(station_xy)
+    query_xy = index.xy if query_xy is None else np.asarray(query_xy, "float64")
+    query_xy = query_xy.reshape(-1, 2)
+    n_query = len(query_xy)
+
+    # Coincident points sort first in every k-nearest row, so skip past them
+    n_zero = index.count_within(query_xy, 0.0)
+    k_query = min(k + int(n_zero.max(initial=0)), len(index))
+
+    nearest_k = np.full((n_query, k), np.nan)
+    if k_query > 0:
+        dists, _ = index.k_nearest(query_xy, k_query)
+        pos = n_zero[:, None] + np.arange(k)
+        valid = pos < k_query
+        nearest_k = np.take_along_axis(dists, np.minimum(pos, k_query - 1), axis=1)
+        nearest_k[~valid] = np.nan
+
+    features = {"nearest_station_dist_m": nearest_k[:, 0]}
+    for radius_m in radii_m:
+        features[f"stations_within_{radius_m}m"] = (
+            index.count_within(query_xy, radius_m) - n_zero
+        )
+    features[f"avg_stations_dist_{k}_nearest_m"] = nearest_k.mean(axis=1)
+
+    return pd.DataFrame(features)
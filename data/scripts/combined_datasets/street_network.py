@@ -0,0 +1,233 @@
+"""
+Street-network (bike) distances for station features.
+
+The v5 distances are straight lines, which overstates access across I-35,
+the river and MoPac. `StreetNetwork` answers the same questions along a
+cached osmnx bike graph instead:
+
+  - `nearest_distance`: network distance from each query point to the
+    closest point of a source table. All sources are tied to one virtual
+    node, so this is a single Dijkstra pass per source table, however many
+    query points there are.
+  - `reach`: counts / weighted sums of several source tables within network
+    radii, from one radius-limited Dijkstra per unique query node that every
+    source table and radius shares.
+
+Points and sources are snapped to their nearest graph node with a KD-tree,
+and the straight-line snap distances are added to the path length at both
+ends. The graph is read from GraphML on disk (written by
+`python street_network.py --download`, the only step that needs network
+access) and the parsed arrays are cached next to it as .npz, so a build
+never talks to Overpass.
+"""
+
+import argparse
+import hashlib
+import xml.etree.ElementTree as ET
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+from projection import METRIC_CRS, project_to_metric
+from scipy import sparse
+from scipy.sparse import csgraph
+from spatial_index import PointIndex
+
+PLACE = "Travis County, Texas, USA"
+DEFAULT_GRAPHML = (
+    Path(__file__).resolve().parents[2] / "raw" / "network" / "travis_bike.graphml"
+)
+
+# csgraph treats stored zeros as missing edges, so zero-length edges
+# (duplicate nodes at one spot) get a negligible positive weight
+MIN_EDGE_M = 1e-3
+
+_GRAPHML_NS = "{http://graphml.graphdrawing.org/xmlns}"
+
+
+def read_graphml(path):
+    """
+    (node lat, node lon, edge source positions, edge target positions, edge
+    lengths in m) from an osmnx GraphML file, streamed with iterparse so the
+    graph is never materialised as networkx objects. Undirected graphs get
+    each edge in both directions.
+    """
+    keys, node_pos, lat, lon = {}, {}, [], []
+    u, v, length = [], [], []
+    directed = True
+
+    for _, elem in ET.iterparse(path, events=("end",)):
+        tag = elem.tag.removeprefix(_GRAPHML_NS)
+        if tag == "key":
+            keys[elem.get("id")] = elem.get("attr.name")
+        elif tag == "node":
+            data = {keys.get(d.get("key")): d.text for d in elem}
+            node_pos[elem.get("id")] = len(lat)
+            lat.append(float(data["y"]))
+            lon.append(float(data["x"]))
+            elem.clear()
+        elif tag == "edge":
+            data = {keys.get(d.get("key")): d.text for d in elem}
+            u.append(node_pos[elem.get("source")])
+            v.append(node_pos[elem.get("target")])
+            length.append(float(data["length"]))
+            elem.clear()
+        elif tag == "graph":
+            directed = elem.get("edgedefault", "directed") == "directed"
+
+    u, v, length = np.array(u, int), np.array(v, int), np.array(length)
+    if not directed:
+        u, v, length = np.r_[u, v], np.r_[v, u], np.r_[length, length]
+    return np.array(lat), np.array(lon), u, v, length
+
+
+class StreetNetwork:
+    def __init__(self, node_xy, u, v, length):
+        self.node_xy = np.asarray(node_xy, dtype="float64").reshape(-1, 2)
+        self.node_index = PointIndex(self.node_xy)
+
+        # shortest of any parallel edges; self-loops never shorten a path
+        u, v, length = np.asarray(u), np.asarray(v), np.asarray(length, "float64")
+        keep = u != v
+        u, v, length = u[keep], v[keep], np.maximum(length[keep], MIN_EDGE_M)
+        order = np.lexsort((length, v, u))
+        u, v, length = u[order], v[order], length[order]
+        first = np.r_[True, (u[1:] != u[:-1]) | (v[1:] != v[:-1])]
+        self.u, self.v, self.length = u[first], v[first], length[first]
+
+        n = len(self.node_xy)
+        self.graph = sparse.csr_matrix((self.length, (self.u, self.v)), shape=(n, n))
+
+    @classmethod
+    def from_graphml(cls, path=DEFAULT_GRAPHML, crs=METRIC_CRS):
+        """Load a GraphML graph, reusing the parsed .npz next to it when current."""
+        path = Path(path)
+        npz_path = path.with_suffix(".npz")
+        if npz_path.exists() and npz_path.stat().st_mtime >= path.stat().st_mtime:
+            arrays = np.load(npz_path)
+            lat, lon = arrays["lat"], arrays["lon"]
+            u, v, length = arrays["u"], arrays["v"], arrays["length"]
+        else:
+            lat, lon, u, v, length = read_graphml(path)
+            np.savez(npz_path, lat=lat, lon=lon, u=u, v=v, length=length)
+
+        return cls(np.column_stack(project_to_metric(lat, lon, crs)), u, v, length)
+
+    def __len__(self):
+        return len(self.node_xy)
+
+    @cached_property
+    def version(self):
+        """Short content hash of the graph, for keying results cached on disk."""
+        digest = hashlib.sha1()
+        for arr in (self.node_xy, self.u, self.v, self.length):
+            digest.update(np.ascontiguousarray(arr).tobytes())
+        return digest.hexdigest()[:12]
+
+    def snap(self, xy):
+        """Nearest graph node position and straight-line snap distance per point."""
+        dists, pos = self.node_index.nearest(xy)
+        return pos, dists
+
+    def nearest_distance(self, query_xy, source_xy):
+        """
+        Network distance from each query point to the closest source point
+        (NaN when no source is reachable or there are no sources).
+        """
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        source_xy = np.asarray(source_xy, dtype="float64").reshape(-1, 2)
+        if len(source_xy) == 0:
+            return np.full(len(query_xy), np.nan)
+
+        # Reverse graph plus a virtual node V with an edge V -> source node per
+        # source node: distance from V is then the distance *to* the nearest
+        # source. csr_matrix sums duplicate entries, so sources sharing a node
+        # share one edge weighted by the closest of them
+        source_node, source_off = self.snap(source_xy)
+        n = len(self)
+        off = np.full(n, np.inf)
+        np.minimum.at(off, source_node, source_off)
+        source_node = np.flatnonzero(np.isfinite(off))
+        graph = sparse.csr_matrix(
+            (
+                np.r_[self.length, np.maximum(off[source_node], MIN_EDGE_M)],
+                (
+                    np.r_[self.v, np.full(len(source_node), n)],
+                    np.r_[self.u, source_node],
+                ),
+            ),
+            shape=(n + 1, n + 1),
+        )
+        to_source = csgraph.dijkstra(graph, indices=n, min_only=True)
+
+        query_node, query_off = self.snap(query_xy)
+        dists = query_off + to_source[query_node]
+        return np.where(np.isfinite(dists), dists, np.nan)
+
+    def reach(self, query_xy, targets, radii_m, chunk_size=64):
+        """
+        Network counts / sums of several source tables within each radius.
+
+        `targets` maps a name to (source_xy, weights), weights None to count.
+        Returns {(name, radius): array per query point}. Dijkstra runs once
+        per unique query node, limited to the largest radius, in chunks of
+        `chunk_size` nodes to bound the (chunk x graph nodes) distance matrix.
+        """
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+        query_node, query_off = self.snap(query_xy)
+        nodes, query_row = np.unique(query_node, return_inverse=True)
+        max_radius = max(radii_m)
+
+        snapped = {}
+        for name, (source_xy, weights) in targets.items():
+            source_xy = np.asarray(source_xy, dtype="float64").reshape(-1, 2)
+            source_node, source_off = self.snap(source_xy)
+            if weights is None:
+                weights = np.ones(len(source_xy))
+            snapped[name] = (source_node, source_off, np.asarray(weights, "float64"))
+
+        out = {(name, r): np.zeros(len(query_xy)) for name in targets for r in radii_m}
+        for start in range(0, len(nodes), chunk_size):
+            rows = np.flatnonzero(
+                (query_row >= start) & (query_row < start + chunk_size)
+            )
+            node_dists = csgraph.dijkstra(
+                self.graph, indices=nodes[start : start + chunk_size], limit=max_radius
+            )
+            for name, (source_node, source_off, weights) in snapped.items():
+                if len(source_node) == 0:
+                    continue
+                dists = (
+                    node_dists[query_row[rows] - start][:, source_node]
+                    + query_off[rows, None]
+                    + source_off[None, :]
+                )
+                for r in radii_m:
+                    out[(name, r)][rows] = (dists <= r) @ weights
+        return out
+
+
+def load_street_network(path=DEFAULT_GRAPHML, crs=METRIC_CRS):
+    return StreetNetwork.from_graphml(path, crs)
+
+
+def download_graph(path=DEFAULT_GRAPHML, place=PLACE):
+    """Fetch the county bike network with osmnx and write it as GraphML."""
+    import osmnx as ox
+
+    graph = ox.graph_from_place(place, network_type="bike")
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    ox.save_graphml(graph, path)
+    return graph
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache the county bike network.")
+    parser.add_argument("--download", action="store_true", help="fetch with osmnx")
+    parser.add_argument("--graphml", default=DEFAULT_GRAPHML)
+    args = parser.parse_args()
+
+    if args.download:
+        download_graph(args.graphml)
+    network = load_street_network(args.graphml)
+    print(f"{len(network):,} nodes, {len(network.u):,} edges from {args.graphml}")
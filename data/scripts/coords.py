@@ -1,143 +1,16 @@
 # %% [markdown]
-# # CapMetro Bikeshare – Clean names, join scoring + coords, and manually patch missing coordinates
+# # CapMetro Bikeshare – Clean names, match scoring to kiosks, and manually patch missing coordinates
 # NOTE: EAST 8TH & TRINITY + 7/pleasant valley COORDAINATES ARE ESTIMATES. NOT EXACT!!!
 
 # %%
-import re
-
 import pandas as pd
+from artifacts import artifact_path, save_artifact
+from kiosk_names import normalize_kiosk_names
+from station_matching import NameIndex, match_names
 
 pd.set_option("display.max_rows", None)
 pd.set_option("display.max_columns", None)
 
-# %%
-DIRECTION_WORDS = r"(?:east|west|north|south|e|w|n|s)\.?"
-
-# tokens that should NOT become part of the 2-street key
-LANDMARK_WORDS = {
-    "station",
-    "parking",
-    "garage",
-    "visitors",
-    "visitor",
-    "capitol",
-    "capitol station",
-    "museum",
-    "bullock",
-    "convention",
-    "center",
-    "city",
-    "hall",
-    "library",
-    "lbj",
-    "bridge",
-    "pedestrian",
-    "mopac",
-    "auditorium",
-    "palmer",
-    "hq",
-    "capital",
-    "metro",
-    "square",
-    "republic",
-    "park",
-    "pease",
-    "boardwalk",
-    "west",
-    "fairmont",
-    "hostel",
-    "victory",
-    "grill",
-    "acc",
-    "ut",
-    "mall",
-    "the",
-}
-
-
-# %%
-def _is_street_like(tok: str) -> bool:
-    """
-    Heuristic: keep things that look like streets:
-    - contains a digit (6, 11, 22.5, etc)
-    - or is a normal street name (letters, maybe 1-2 words)
-    """
-    if re.search(r"\d", tok):
-        return True
-    return bool(re.fullmatch(r"[a-z]+(?: [a-z]+){0,2}", tok))
-
-
-def normalize_kiosk_name_v3(x: object) -> str:
-    if pd.isna(x):
-        return ""
-    s = str(x)
-
-    # whitespace + lowercase
-    s = s.replace("\u00a0", " ")
-    s = re.sub(r"[\t\r\n]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip().lower()
-
-    # drop junk rows
-    if re.search(r"(projected rubric score|station status|office/main/shop/repair)", s):
-        return ""
-
-    # remove parenthetical alternates
-    s = re.sub(r"\s*\(.*?\)\s*", " ", s)
-
-    # normalize 22nd 1/2 -> 22.5
-    s = re.sub(r"\b(\d+)(st|nd|rd|th)\s*1/2\b", r"\1.5", s)
-
-    # ordinal -> number
-    s = re.sub(r"\b(\d+)(st|nd|rd|th)\b", r"\1", s)
-
-    # remove road-type words
-    s = re.sub(
-        r"\b(street|st|avenue|ave|boulevard|blvd|road|rd|drive|dr|lane|ln|trail|trl)\b\.?",
-        "",
-        s,
-    )
-
-    # remove direction words (W/E/N/S)
-    s = re.sub(rf"\b{DIRECTION_WORDS}\b", "", s)
-
-    # unify separators to "/"
-    s = re.sub(r"\s*(?:&|@| at | and |/)\s*", "/", s)
-    s = re.sub(r"\s*-\s*", "/", s)
-
-    # keep only letters/numbers/slash/spaces
-    s = re.sub(r"[^a-z0-9/ ]+", "", s)
-
-    # normalize spaces around slashes
-    s = re.sub(r"\s*/\s*", "/", s)
-    s = re.sub(r"/{2,}", "/", s).strip("/").strip()
-    s = re.sub(r"\s+", " ", s).strip()
-
-    if not s:
-        return ""
-
-    parts = [p.strip() for p in s.split("/") if p.strip()]
-
-    cleaned_parts = []
-    for p in parts:
-        words = [w for w in p.split() if w not in LANDMARK_WORDS]
-        p2 = " ".join(words).strip()
-        if p2:
-            cleaned_parts.append(p2)
-
-    street_candidates = [p for p in cleaned_parts if _is_street_like(p)]
-
-    # If we have >=2, build a sorted intersection key
-    if len(street_candidates) >= 2:
-        a, b = street_candidates[0], street_candidates[1]
-        return "/".join(sorted([a, b]))
-
-    # Otherwise fall back to a place key
-    if cleaned_parts:
-        return cleaned_parts[0]
-
-    return ""
-
-
 # %%
 # --------- load data ---------
 file_path = "../raw/scoring/curr_station_rubric.xlsx"
@@ -149,17 +22,21 @@ coords_df = coords_df[coords_df["Kiosk Status"].astype(str).str.lower() == "acti
 
 # %%
 # --------- create name_clean in both tables ---------
-coords_df["name_clean"] = coords_df["Kiosk Name"].map(normalize_kiosk_name_v3)
-scores["name_clean"] = scores["name"].map(normalize_kiosk_name_v3)
+coords_df["name_clean"] = normalize_kiosk_names(coords_df["Kiosk Name"])
+scores["name_clean"] = normalize_kiosk_names(scores["name"])
 
-coords = coords_df[coords_df["name_clean"].ne("")].copy()
 scores = scores[scores["name_clean"].ne("")].copy()
 
 # %%
-# --------- join on cleaned key ---------
-joined = scores.merge(
-    coords, on="name_clean", how="left", suffixes=("_scores", "_coords")
-)
+# --------- match scores to kiosks (exact key, then fuzzy) ---------
+# landmark-only kiosks ("Palmer Auditorium") have no key but still match fuzzily
+coords = coords_df.reset_index(drop=True)
+matches = match_names(scores["name"], NameIndex(coords["Kiosk Name"]))
+
+joined = scores.reset_index(drop=True)
+kiosk_rows = coords.reindex(matches["pos"].to_numpy()).reset_index(drop=True)
+joined[["Kiosk Name", "Location"]] = kiosk_rows[["Kiosk Name", "Location"]]
+joined["match_confidence"] = matches["confidence"].to_numpy()
 
 loc = joined["Location"].astype("string")
 
@@ -170,33 +47,28 @@ joined["lat"] = pd.to_numeric(extracted[0], errors="coerce")
 joined["lon"] = pd.to_numeric(extracted[1], errors="coerce")
 
 # %%
-# --------- find score keys missing from coords ---------
-coords_keys = pd.Index(coords["name_clean"].dropna().unique())
-scores_keys = pd.Index(scores["name_clean"].dropna().unique())
+# --------- review fuzzy matches / find score keys with no kiosk ---------
+fuzzy = joined[joined["match_confidence"].between(0, 1, inclusive="neither")]
+print(f"Fuzzy matches: {len(fuzzy)}")
+print(fuzzy[["name", "Kiosk Name", "match_confidence"]])
 
-in_scores_not_coords = scores_keys.difference(coords_keys).sort_values()
+in_scores_not_coords = joined.loc[joined["Kiosk Name"].isna(), "name_clean"]
 print(f"In scores, not in coords: {len(in_scores_not_coords)}")
-print(in_scores_not_coords.tolist())
+print(in_scores_not_coords.sort_values().tolist())
 
 # %%
-# --------- manual coordinate patches (lat/lon) for missing keys ---------
+# --------- manual coordinate patches (lat/lon) for keys with no kiosk match ---------
 manual_coords = pd.DataFrame(
     [
-        ("1/riverside", 30.259384, -97.749726),
         ("11/waller", 30.26899800040119, -97.72843433423911),
-        ("12/san jacinto", 30.273499, -97.738097),
         ("30/whitis", 30.295427, -97.739347),
         ("5/neches", 30.265843991099903, -97.73891781267969),
         ("6/chicon", 30.259718, -97.723198),
-        ("7/congress", 30.26822, -97.74285),
-        ("atlanta/veterans", 30.274475, -97.769892),
         ("azie morton/barton springs", 30.261881964956064, -97.76897665654796),
-        ("barton springs/bouldin", 30.25966, -97.753445),
         ("cesar chavez/pleasant valley", 30.252951, -97.712467),
         ("dean keeton/place", 30.28931, -97.733037),
         ("dean keeton/robert dedman", 30.28785, -97.728541),
         ("electric/pfluger ped", 30.267064, -97.75482),
-        ("guadalupe/university co", 30.285664, -97.741792),
         ("lady bird/lakeshore", 30.24478312140979, -97.72319224423872),
         ("neal/webberville", 30.267506, -97.707997),
         ("northwestern/webberville", 30.263061, -97.713433),
@@ -269,11 +141,17 @@ ut_stations = {
 # Add binary column: 1 if station name is in the UT set, else 0
 joined["on_UT"] = joined["name"].isin(ut_stations).astype(int)
 
-joined = joined[["name", "name_clean", "Kiosk Name", "lat", "lon"]]
+joined = joined[["name", "name_clean", "Kiosk Name", "lat", "lon", "match_confidence"]]
 
-joined.columns = ["scoring_name", "cleaned_name", "coordinate_name", "lat", "lon"]
+joined.columns = [
+    "scoring_name",
+    "cleaned_name",
+    "coordinate_name",
+    "lat",
+    "lon",
+    "match_confidence",
+]
 
 # %%
-out_path = "../cleaned/coords/semi_cleaned/raw_scores_with_coords.csv"
-joined.to_csv(out_path, index=False)
-print("Saved:", out_path)
+save_artifact(joined, "raw_scores_with_coords")
+print("Saved:", artifact_path("raw_scores_with_coords"))
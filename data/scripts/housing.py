@@ -3,6 +3,7 @@ import folium
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+from artifacts import save_artifact
 
 # %%
 # --------------------------------------------------
@@ -92,5 +93,5 @@ print(housing_clean.dtypes)
 print(housing_clean.shape)
 
 # %%
-# Save cleaned CSV
-housing_clean.to_csv("../cleaned/housing/housing.csv", index=False)
+# Save cleaned parquet + CSV
+save_artifact(housing_clean, "housing")
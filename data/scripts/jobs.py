@@ -1,27 +1,24 @@
-import pandas as pd
-
-TRAVIS_FIPS = 48453  # Travis County, TX
-
-df1 = pd.read_csv("../raw/employment/blocks.csv", dtype={"tabblk2020": str})
-df2 = pd.read_csv("../raw/employment/jobs_per_block.csv", dtype={"w_geocode": str})
-
-# Keep only Travis County blocks (crosswalk has county)
-xwalk_travis = df1.loc[
-    df1["cty"] == TRAVIS_FIPS, ["tabblk2020", "blklatdd", "blklondd"]
-].copy()
-
-# WAC (jobs) -> rename join key to match
-wac = df2[["w_geocode", "C000"]].rename(columns={"w_geocode": "tabblk2020"})
-
-# Merge: only jobs that fall on Travis blocks will match
-jobs_blocks_travis = wac.merge(xwalk_travis, on="tabblk2020", how="inner")
+from artifacts import save_artifact
+from lodes import TRAVIS_FIPS, WAC_SEGMENTS, read_county_jobs
+
+# Keep only Travis County blocks; the statewide crosswalk and WAC files are
+# streamed in chunks with only the needed columns, and all WAC segments
+# (age / earnings / industry) are read in the same pass as C000. Only jobs
+# that fall on Travis blocks survive the join
+jobs_blocks_travis = read_county_jobs(
+    "../raw/employment/blocks.csv",
+    "../raw/employment/jobs_per_block.csv",
+    TRAVIS_FIPS,
+    WAC_SEGMENTS,
+)
 
 # Quick checks
-print("Travis blocks in xwalk:", len(xwalk_travis))
 print("Jobs blocks matched in Travis:", len(jobs_blocks_travis))
 print(jobs_blocks_travis.head())
 
-jobs_blocks_travis = jobs_blocks_travis[["C000", "blklatdd", "blklondd"]]
-jobs_blocks_travis.columns = ["job_count", "lat", "lon"]
+# job_count, lat, lon as before, then the segments as lowercase codes
+segments = WAC_SEGMENTS[1:]
+jobs_blocks_travis = jobs_blocks_travis[["C000", "blklatdd", "blklondd", *segments]]
+jobs_blocks_travis.columns = ["job_count", "lat", "lon", *map(str.lower, segments)]
 
-jobs_blocks_travis.to_csv("../cleaned/jobs/jobs.csv", index=False)
+save_artifact(jobs_blocks_travis, "jobs")
@@ -0,0 +1,253 @@
+"""
+Kiosk / rubric station-name normalization used to join coords.py's tables.
+
+`normalize_kiosk_names` turns a Series of names into intersection keys such
+as "11/waller": the regex clean-up runs as pandas `.str` operations with
+patterns compiled once at import, over the unique names only, and the final
+street-key assembly for each cleaned string is memoized. It returns exactly
+what `normalize_kiosk_name_v3` returns row by row, which is kept as the
+reference; `python kiosk_names.py` checks the two agree on the raw kiosk
+list and the rubric.
+"""
+
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+DIRECTION_WORDS = r"(?:east|west|north|south|e|w|n|s)\.?"
+
+# tokens that should NOT become part of the 2-street key
+LANDMARK_WORDS = {
+    "station",
+    "parking",
+    "garage",
+    "visitors",
+    "visitor",
+    "capitol",
+    "capitol station",
+    "museum",
+    "bullock",
+    "convention",
+    "center",
+    "city",
+    "hall",
+    "library",
+    "lbj",
+    "bridge",
+    "pedestrian",
+    "mopac",
+    "auditorium",
+    "palmer",
+    "hq",
+    "capital",
+    "metro",
+    "square",
+    "republic",
+    "park",
+    "pease",
+    "boardwalk",
+    "west",
+    "fairmont",
+    "hostel",
+    "victory",
+    "grill",
+    "acc",
+    "ut",
+    "mall",
+    "the",
+}
+
+JUNK_PATTERN = re.compile(
+    r"(?:projected rubric score|station status|office/main/shop/repair)"
+)
+
+# (pattern, replacement) applied in order after whitespace / case clean-up
+CLEANUP_STEPS = [
+    # remove parenthetical alternates
+    (re.compile(r"\s*\(.*?\)\s*"), " "),
+    # normalize 22nd 1/2 -> 22.5
+    (re.compile(r"\b(\d+)(st|nd|rd|th)\s*1/2\b"), r"\1.5"),
+    # ordinal -> number
+    (re.compile(r"\b(\d+)(st|nd|rd|th)\b"), r"\1"),
+    # remove road-type words
+    (
+        re.compile(
+            r"\b(street|st|avenue|ave|boulevard|blvd|road|rd|drive|dr|lane|ln|trail|trl)\b\.?"
+        ),
+        "",
+    ),
+    # remove direction words (W/E/N/S)
+    (re.compile(rf"\b{DIRECTION_WORDS}\b"), ""),
+    # unify separators to "/"
+    (re.compile(r"\s*(?:&|@| at | and |/)\s*"), "/"),
+    (re.compile(r"\s*-\s*"), "/"),
+    # keep only letters/numbers/slash/spaces
+    (re.compile(r"[^a-z0-9/ ]+"), ""),
+    # normalize spaces around slashes
+    (re.compile(r"\s*/\s*"), "/"),
+    (re.compile(r"/{2,}"), "/"),
+]
+
+LINE_BREAKS = re.compile(r"[\t\r\n]+")
+SPACES = re.compile(r"\s+")
+DIGIT = re.compile(r"\d")
+STREET_WORDS = re.compile(r"[a-z]+(?: [a-z]+){0,2}")
+
+
+def _street_like(tok: str) -> bool:
+    """`_is_street_like` with the patterns compiled once."""
+    if DIGIT.search(tok):
+        return True
+    return bool(STREET_WORDS.fullmatch(tok))
+
+
+@lru_cache(maxsize=4096)
+def street_key(s: str) -> str:
+    """Intersection key ("a/b", sorted) or place key from a cleaned name."""
+    if not s:
+        return ""
+
+    parts = [p.strip() for p in s.split("/") if p.strip()]
+
+    cleaned_parts = []
+    for p in parts:
+        words = [w for w in p.split() if w not in LANDMARK_WORDS]
+        p2 = " ".join(words).strip()
+        if p2:
+            cleaned_parts.append(p2)
+
+    street_candidates = [p for p in cleaned_parts if _street_like(p)]
+
+    # If we have >=2, build a sorted intersection key
+    if len(street_candidates) >= 2:
+        a, b = street_candidates[0], street_candidates[1]
+        return "/".join(sorted([a, b]))
+
+    # Otherwise fall back to a place key
+    if cleaned_parts:
+        return cleaned_parts[0]
+
+    return ""
+
+
+def normalize_kiosk_names(names: pd.Series) -> pd.Series:
+    """Vectorized `normalize_kiosk_name_v3` over a Series, index preserved."""
+    codes, uniques = pd.factorize(names, use_na_sentinel=True)
+
+    s = pd.Series(uniques, dtype=object).map(str).astype(str)
+    s = s.str.replace("\u00a0", " ", regex=False)
+    s = s.str.replace(LINE_BREAKS, " ", regex=True)
+    s = s.str.replace(SPACES, " ", regex=True).str.strip().str.lower()
+
+    junk = s.str.contains(JUNK_PATTERN, regex=True)
+
+    for pattern, repl in CLEANUP_STEPS:
+        s = s.str.replace(pattern, repl, regex=True)
+    s = s.str.strip("/").str.strip()
+    s = s.str.replace(SPACES, " ", regex=True).str.strip()
+
+    keys = s.map(street_key).where(~junk, "").to_numpy(dtype=object)
+
+    # factorize marks missing names with -1; they normalize to ""
+    out = pd.Series("", index=names.index, dtype=object)
+    present = codes >= 0
+    out[present] = keys[codes[present]]
+    return out.astype(str)
+
+
+# Row-wise reference, kept as originally written in coords.py
+def _is_street_like(tok: str) -> bool:
+    """
+    Heuristic: keep things that look like streets:
+    - contains a digit (6, 11, 22.5, etc)
+    - or is a normal street name (letters, maybe 1-2 words)
+    """
+    if re.search(r"\d", tok):
+        return True
+    return bool(re.fullmatch(r"[a-z]+(?: [a-z]+){0,2}", tok))
+
+
+def normalize_kiosk_name_v3(x: object) -> str:
+    """Row-wise reference implementation of `normalize_kiosk_names`."""
+    if pd.isna(x):
+        return ""
+    s = str(x)
+
+    # whitespace + lowercase
+    s = s.replace("\u00a0", " ")
+    s = re.sub(r"[\t\r\n]+", " ", s)
+    s = re.sub(r"\s+", " ", s).strip().lower()
+
+    # drop junk rows
+    if re.search(r"(projected rubric score|station status|office/main/shop/repair)", s):
+        return ""
+
+    # remove parenthetical alternates
+    s = re.sub(r"\s*\(.*?\)\s*", " ", s)
+
+    # normalize 22nd 1/2 -> 22.5
+    s = re.sub(r"\b(\d+)(st|nd|rd|th)\s*1/2\b", r"\1.5", s)
+
+    # ordinal -> number
+    s = re.sub(r"\b(\d+)(st|nd|rd|th)\b", r"\1", s)
+
+    # remove road-type words
+    s = re.sub(
+        r"\b(street|st|avenue|ave|boulevard|blvd|road|rd|drive|dr|lane|ln|trail|trl)\b\.?",
+        "",
+        s,
+    )
+
+    # remove direction words (W/E/N/S)
+    s = re.sub(rf"\b{DIRECTION_WORDS}\b", "", s)
+
+    # unify separators to "/"
+    s = re.sub(r"\s*(?:&|@| at | and |/)\s*", "/", s)
+    s = re.sub(r"\s*-\s*", "/", s)
+
+    # keep only letters/numbers/slash/spaces
+    s = re.sub(r"[^a-z0-9/ ]+", "", s)
+
+    # normalize spaces around slashes
+    s = re.sub(r"\s*/\s*", "/", s)
+    s = re.sub(r"/{2,}", "/", s).strip("/").strip()
+    s = re.sub(r"\s+", " ", s).strip()
+
+    if not s:
+        return ""
+
+    parts = [p.strip() for p in s.split("/") if p.strip()]
+
+    cleaned_parts = []
+    for p in parts:
+        words = [w for w in p.split() if w not in LANDMARK_WORDS]
+        p2 = " ".join(words).strip()
+        if p2:
+            cleaned_parts.append(p2)
+
+    street_candidates = [p for p in cleaned_parts if _is_street_like(p)]
+
+    # If we have >=2, build a sorted intersection key
+    if len(street_candidates) >= 2:
+        a, b = street_candidates[0], street_candidates[1]
+        return "/".join(sorted([a, b]))
+
+    # Otherwise fall back to a place key
+    if cleaned_parts:
+        return cleaned_parts[0]
+
+    return ""
+
+
+if __name__ == "__main__":
+    # the vectorized normalizer must reproduce the reference exactly
+    kiosks = pd.read_csv("../raw/coords/kiosk_locations.csv")["Kiosk Name"]
+    rubric = pd.read_excel("../raw/scoring/curr_station_rubric.xlsx", header=2)["name"]
+
+    for label, names in [("kiosk_locations.csv", kiosks), ("rubric", rubric)]:
+        expected = names.map(normalize_kiosk_name_v3)
+        got = normalize_kiosk_names(names)
+        mismatched = expected.ne(got)
+        assert not mismatched.any(), names[mismatched].head().tolist()
+        print(f"{label}: {len(names)} names, {names.nunique()} unique, all match")
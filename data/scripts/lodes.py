@@ -0,0 +1,81 @@
+"""
+Streaming readers for the LODES workplace-area (WAC) and block crosswalk
+files used by jobs.py (via `read_county_jobs`).
+
+The statewide files are hundreds of MB, but a build only needs one county
+and a handful of columns. Both readers load only the columns they are asked
+for and filter every chunk to the county before keeping it, so peak memory
+depends on the chunk size and the county, not on the size of the state.
+"""
+
+import pandas as pd
+
+TRAVIS_FIPS = 48453  # Travis County, TX
+
+CROSSWALK_COLS = ["tabblk2020", "cty", "blklatdd", "blklondd"]
+
+# WAC total jobs; segment columns (CA01, CE01, CNS01, ...) can be added
+DEFAULT_SEGMENTS = ("C000",)
+
+# Jobs by worker age (<=29, 30-54, 55+), monthly earnings (<=$1250,
+# $1251-3333, >$3333) and NAICS sector (CNS01 agriculture ... CNS20 public
+# administration)
+AGE_SEGMENTS = ["CA01", "CA02", "CA03"]
+EARNINGS_SEGMENTS = ["CE01", "CE02", "CE03"]
+INDUSTRY_SEGMENTS = [f"CNS{i:02d}" for i in range(1, 21)]
+WAC_SEGMENTS = ["C000", *AGE_SEGMENTS, *EARNINGS_SEGMENTS, *INDUSTRY_SEGMENTS]
+
+
+def _filtered_chunks(path, keep, chunksize, **read_kwargs):
+    """Concatenate the rows of each CSV chunk that `keep(chunk)` selects."""
+    parts = [
+        chunk[keep(chunk)]
+        for chunk in pd.read_csv(path, chunksize=chunksize, **read_kwargs)
+    ]
+    if not parts:
+        return pd.read_csv(path, nrows=0, **read_kwargs)
+    return pd.concat(parts, ignore_index=True)
+
+
+def read_block_crosswalk(path, county_fips=TRAVIS_FIPS, chunksize=250_000):
+    """Block id and internal point (lat / lon) of every block in the county."""
+    return _filtered_chunks(
+        path,
+        lambda chunk: chunk["cty"] == county_fips,
+        chunksize,
+        usecols=CROSSWALK_COLS,
+        dtype={"tabblk2020": str, "cty": "int32"},
+    )[["tabblk2020", "blklatdd", "blklondd"]]
+
+
+def read_wac(
+    path, county_fips=TRAVIS_FIPS, segments=DEFAULT_SEGMENTS, chunksize=250_000
+):
+    """
+    WAC job counts for the county's blocks, keyed by `w_geocode`.
+
+    Block geocodes start with the 5-digit state + county FIPS, so the county
+    filter is a prefix test on each chunk.
+    """
+    prefix = f"{county_fips:05d}"
+    return _filtered_chunks(
+        path,
+        lambda chunk: chunk["w_geocode"].str.startswith(prefix),
+        chunksize,
+        usecols=["w_geocode", *segments],
+        dtype={"w_geocode": str, **{col: "int32" for col in segments}},
+    )
+
+
+def read_county_jobs(
+    crosswalk_path,
+    wac_path,
+    county_fips=TRAVIS_FIPS,
+    segments=DEFAULT_SEGMENTS,
+    chunksize=250_000,
+):
+    """WAC segments joined to block lat / lon for one county."""
+    xwalk = read_block_crosswalk(crosswalk_path, county_fips, chunksize)
+    wac = read_wac(wac_path, county_fips, segments, chunksize)
+    wac = wac.rename(columns={"w_geocode": "tabblk2020"})
+    return wac.merge(xwalk, on="tabblk2020", how="inner")
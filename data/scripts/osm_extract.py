@@ -0,0 +1,235 @@
+"""
+Local OSM point-of-interest extract behind pois.py.
+
+Instead of calling `ox.features_from_place` live, pois.py reads one parsed
+extract of every feature carrying any of OSM_KEYS in the county, stored as
+GeoParquet at EXTRACT_PATH, and picks its tag groups out of it with
+`select_tags`. Reruns only read the parquet.
+
+The extract is built, in order of preference, from:
+  - a local snapshot passed as `snapshot` (GeoJSON / GeoPackage / GeoParquet,
+    or .osm.pbf when pyrosm is installed)
+  - the Overpass responses already in osmnx's cache folder (cache/), which
+    is how the committed extract was made
+  - a single live osmnx download of the union of OSM_KEYS (`--refresh`)
+
+    python osm_extract.py                 # rebuild from cache/
+    python osm_extract.py --snapshot travis.osm.pbf
+    python osm_extract.py --refresh       # one Overpass download
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import LineString, Point, Polygon, shape
+from shapely.ops import linemerge, polygonize, unary_union
+
+PLACE = "Travis County, Texas, USA"
+
+# Every tag key in pois.POI_CATEGORIES
+OSM_KEYS = ("amenity", "leisure", "shop", "tourism")
+
+# osmnx's default cache folder when the cleaning scripts run from here
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+EXTRACT_PATH = CACHE_DIR / "travis_county_pois.parquet"
+
+EXTRACT_COLUMNS = ["element", "id", "name", *OSM_KEYS, "geometry"]
+
+
+def _cached_responses(cache_dir):
+    """(Overpass responses, Nominatim results) from an osmnx cache folder."""
+    overpass, nominatim = [], []
+    for path in sorted(Path(cache_dir).glob("*.json")):
+        with open(path) as f:
+            response = json.load(f)
+        if isinstance(response, list):
+            nominatim.extend(response)
+        elif "elements" in response:
+            overpass.append(response)
+    return overpass, nominatim
+
+
+def place_polygon(nominatim, place=PLACE):
+    """Boundary of `place` from cached Nominatim results."""
+    name = place.split(",")[0].strip()
+    for result in nominatim:
+        if result.get("name") == name and "geojson" in result:
+            return shape(result["geojson"])
+    raise LookupError(f"No cached boundary for {place!r}")
+
+
+def county_boundary(cache_dir=CACHE_DIR, place=PLACE):
+    """Lon/lat boundary of `place` from the osmnx cache, no network needed."""
+    _, nominatim = _cached_responses(cache_dir)
+    return place_polygon(nominatim, place)
+
+
+def _way_geometry(node_ids, tags, coords):
+    """Closed ways are areas unless tagged area=no, as in osmnx."""
+    points = [coords[n] for n in node_ids if n in coords]
+    if len(points) < 2:
+        return None
+    if node_ids[0] == node_ids[-1] and len(points) >= 4 and tags.get("area") != "no":
+        return Polygon(points)
+    return LineString(points)
+
+
+def _multipolygon(members, ways, coords):
+    """Outer rings minus inner rings of a multipolygon relation."""
+    rings = {"outer": [], "inner": []}
+    for member in members:
+        role = member.get("role") or "outer"
+        if member["type"] != "way" or member["ref"] not in ways or role not in rings:
+            continue
+        points = [coords[n] for n in ways[member["ref"]][0] if n in coords]
+        if len(points) >= 2:
+            rings[role].append(LineString(points))
+    if not rings["outer"]:
+        return None
+    outer = unary_union(list(polygonize(linemerge(rings["outer"]))))
+    if outer.is_empty:
+        return None
+    if rings["inner"]:
+        outer = outer.difference(
+            unary_union(list(polygonize(linemerge(rings["inner"]))))
+        )
+    return outer
+
+
+def features_from_overpass(responses, keys=OSM_KEYS):
+    """
+    GeoDataFrame of the elements in raw Overpass `responses` that carry any
+    of `keys`, one row per (element, id) even when responses overlap.
+    """
+    coords, ways, relations, rows = {}, {}, {}, {}
+    for response in responses:
+        for el in response["elements"]:
+            if el["type"] == "node":
+                coords[el["id"]] = (el["lon"], el["lat"])
+            elif el["type"] == "way":
+                ways[el["id"]] = (el.get("nodes", []), el.get("tags", {}))
+            elif el["type"] == "relation":
+                relations[el["id"]] = (el.get("members", []), el.get("tags", {}))
+
+    for response in responses:
+        for el in response["elements"]:
+            tags = el.get("tags", {})
+            key = (el["type"], el["id"])
+            if key in rows or not any(k in tags for k in keys):
+                continue
+            if el["type"] == "node":
+                geom = Point(coords[el["id"]])
+            elif el["type"] == "way":
+                geom = _way_geometry(ways[el["id"]][0], tags, coords)
+            elif tags.get("type") == "multipolygon":
+                geom = _multipolygon(relations[el["id"]][0], ways, coords)
+            else:
+                geom = None
+            if geom is not None:
+                rows[key] = {
+                    "name": tags.get("name"),
+                    **{k: tags.get(k) for k in keys},
+                    "geometry": geom,
+                }
+
+    index = pd.MultiIndex.from_tuples(list(rows), names=["element", "id"])
+    gdf = gpd.GeoDataFrame(
+        list(rows.values()), index=index, geometry="geometry", crs="EPSG:4326"
+    )
+    return gdf.reset_index()
+
+
+def read_snapshot(path, keys=OSM_KEYS):
+    """Features carrying any of `keys` from a local extract file."""
+    path = Path(path)
+    if path.name.endswith(".osm.pbf"):
+        # optional: only needed for raw Geofabrik-style extracts
+        from pyrosm import OSM
+
+        gdf = OSM(str(path)).get_pois(custom_filter={k: True for k in keys})
+        gdf = gdf.rename(columns={"osm_type": "element"})
+    elif path.suffix == ".parquet":
+        gdf = gpd.read_parquet(path)
+    else:
+        gdf = gpd.read_file(path)
+
+    for col in ["element", "id", "name", *keys]:
+        if col not in gdf.columns:
+            gdf[col] = None
+    return gdf[gdf[list(keys)].notna().any(axis=1)]
+
+
+def fetch_features(place=PLACE, keys=OSM_KEYS):
+    """One Overpass download of every feature carrying any of `keys`."""
+    import osmnx as ox
+
+    gdf = ox.features_from_place(place, {k: True for k in keys}).reset_index()
+    for col in ["name", *keys]:
+        if col not in gdf.columns:
+            gdf[col] = None
+    return gdf
+
+
+def build_extract(snapshot=None, refresh=False, cache_dir=CACHE_DIR, path=EXTRACT_PATH):
+    """Parse the best available source and write the extract to `path`."""
+    if refresh:
+        gdf = fetch_features()
+    else:
+        overpass, nominatim = _cached_responses(cache_dir)
+        gdf = read_snapshot(snapshot) if snapshot else features_from_overpass(overpass)
+        gdf = gdf.to_crs("EPSG:4326")
+        gdf = gdf[gdf.intersects(place_polygon(nominatim))]
+
+    # osmnx returns features sorted by (element, id); keep that order so
+    # drop_duplicates downstream keeps the same feature
+    gdf = gdf[EXTRACT_COLUMNS].sort_values(["element", "id"]).reset_index(drop=True)
+    gdf["element"] = gdf["element"].astype("category")
+    gdf.to_parquet(path, index=False)
+    return gdf
+
+
+def load_extract(path=EXTRACT_PATH):
+    """The parsed county extract, building it from cache/ on first use."""
+    if Path(path).exists():
+        return gpd.read_parquet(path)
+    return build_extract(path=path)
+
+
+def select_tags(gdf, tags):
+    """
+    Rows matching any entry of an osmnx-style `tags` dict
+    ({key: True | value | [values]}), in one vectorized pass.
+    """
+    mask = np.zeros(len(gdf), dtype=bool)
+    for key, values in tags.items():
+        if key not in gdf.columns:
+            continue
+        if values is True:
+            mask |= gdf[key].notna().to_numpy()
+        else:
+            values = [values] if isinstance(values, str) else values
+            mask |= gdf[key].isin(values).to_numpy()
+    return gdf[mask]
+
+
+def load_pois(tags, path=EXTRACT_PATH):
+    """Drop-in for `ox.features_from_place(PLACE, tags)` on the local extract."""
+    return select_tags(load_extract(path), tags)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the local OSM POI extract.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--snapshot", help="local .osm.pbf / GeoJSON / GeoParquet extract"
+    )
+    source.add_argument("--refresh", action="store_true", help="download from Overpass")
+    args = parser.parse_args()
+
+    extract = build_extract(snapshot=args.snapshot, refresh=args.refresh)
+    print(f"{len(extract):,} features -> {EXTRACT_PATH}")
+    print(extract[list(OSM_KEYS)].notna().sum().to_string())
@@ -1,5 +1,6 @@
 import geopandas as gpd
 import pandas as pd
+import shapely
 from shapely import wkt
 
 parks = pd.read_csv("../raw/amenities/park_borders.csv")
@@ -67,3 +68,11 @@ parks = parks.drop("LOCATION_NAME", axis=1)
 parks = parks.rename(columns={"the_geom": "geometry"})
 
 parks[["name", "geometry"]].to_csv("../cleaned/amenities/parks.csv", index=False)
+
+# GeoParquet copy (WKB geometry) so consumers skip row-wise WKT parsing
+parks_out = gpd.GeoDataFrame(
+    parks[["name"]],
+    geometry=shapely.from_wkt(parks["geometry"].to_numpy()),
+    crs="EPSG:4326",
+)
+parks_out.to_parquet("../cleaned/amenities/parks.parquet", index=False)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from artifacts import save_artifact
+from osm_extract import load_pois, select_tags
+
+# category -> osmnx-style tags, keys in `type` priority order: a feature is
+# typed by the first key it carries, e.g. a retail shop=books + amenity=cafe
+# is shop_books
+POI_CATEGORIES = {
+    "amenities": {
+        "amenity": [
+            "library",
+            "community_centre",
+            "social_centre",
+            "arts_centre",
+            "swimming_pool",
+            "public_bath",
+            "gym",
+            "fitness_centre",
+            "sports_centre",
+            "recreation_ground",
+            "youth_centre",
+            "senior_centre",
+            "event_venue",
+            "townhall",
+            "courthouse",
+            "post_office",
+            "fire_station",
+            "police",
+            "clinic",
+            "hospital",
+            "pharmacy",
+        ],
+        "leisure": [
+            "swimming_pool",
+            "sports_centre",
+            "fitness_centre",
+            "pitch",
+            "track",
+        ],
+    },
+    "retail": {
+        "shop": True,
+        "amenity": [
+            "restaurant",
+            "cafe",
+            "bar",
+            "pub",
+            "fast_food",
+            "ice_cream",
+            "cinema",
+            "theatre",
+            "nightclub",
+            "brewery",
+        ],
+        "tourism": ["museum", "gallery", "attraction"],
+    },
+}
+
+
+def union_tags(groups):
+    """One tags dict matching anything any of `groups` matches."""
+    union = {}
+    for tags in groups:
+        for key, values in tags.items():
+            if values is True or union.get(key) is True:
+                union[key] = True
+            else:
+                union[key] = list(dict.fromkeys([*union.get(key, []), *values]))
+    return union
+
+
+# %%
+# every tag group at once, reduced to points once
+pois = load_pois(union_tags(POI_CATEGORIES.values())).copy()
+pois["geometry"] = pois.geometry.representative_point()
+
+# %%
+frames = []
+for category, tags in POI_CATEGORIES.items():
+    selected = select_tags(pois, tags).drop_duplicates(subset=["geometry"])
+
+    conds = [selected[key].notna() for key in tags]
+    choices = [key + "_" + selected[key].astype(str) for key in tags]
+
+    frames.append(
+        pd.DataFrame(
+            {
+                "name": selected["name"],
+                "lat": selected.geometry.y,
+                "lon": selected.geometry.x,
+                "category": category,
+                "type": np.select(conds, choices, default=np.nan),
+            }
+        )
+    )
+
+poi_table = pd.concat(frames, ignore_index=True)
+poi_table["category"] = pd.Categorical(poi_table["category"], list(POI_CATEGORIES))
+
+print(poi_table.groupby("category", observed=True).size())
+
+save_artifact(poi_table, "pois")
@@ -2,6 +2,8 @@
 import re
 
 import pandas as pd
+from artifacts import save_artifact
+from station_matching import NameIndex, match_names
 
 pd.set_option("display.max_rows", None)
 pd.set_option("display.max_columns", None)
@@ -131,37 +133,15 @@ def clean_station_name(s):
 scores["name_clean"] = scores["name"].apply(clean_station_name)
 trips_df["name_clean"] = trips_df["name"].apply(clean_station_name)
 
-# --- drop rows from trips based on your notes ---
-drop_names = [
-    "30th/Whitis",
-    "E 3rd/Trinity",
-    "E 4th/Neches @ Downtown Station",
-    "E 5th/Shady @ Eastside Bus Plaza",
-    "E 6th/Robert T. Martinez",
-    "E 7th/Congress",
-    "E 7th/Pleasant Valley",
-    "E 8th/San Jacinto",
-    "E Cesar Chavez/Pleasant Valley",
-    "E. 7th/Congress",
-    "Lakeshore/Austin Hostel",
-    "TEST-LucJ",
-    "W 4th/Guadalupe @ Republic Square",
-    "Warehouse Station",
-    "Webberville/Northwestern",
-]
-
-drop_names = [clean_station_name(x) for x in drop_names]
-trips_df = trips_df[~trips_df["name_clean"].isin(drop_names)].copy()
-
-# --- manual fixes for mismatched station names ---
-# key = name in trips
-# value = matching name in curr_stat
-name_map = {
-    "W 6th/Congress": "W 7th/Congress (W 6th/Congress)",
-    "E 12th/San Jacinto @ State Capitol Visitors G": "E 12th/San Jacinto @ State Cap Visitors Garage",
-}
+# --- match trips rows to rubric stations (exact key, then fuzzy) ---
+# trips rows that match no current station (closed, test or projected
+# stations) are left out of the merge
+matches = match_names(scores["name"], NameIndex(trips_df["name"]))
+print(matches[matches["confidence"] < 1])
 
-trips_df["name_clean"] = trips_df["name_clean"].replace(name_map)
+matched = matches[matches["pos"] >= 0]
+trips_df = trips_df.iloc[matched["pos"]].copy()
+trips_df["name_clean"] = scores.loc[matched.index, "name_clean"].to_numpy()
 
 # --- merge ---
 merged = scores.merge(
@@ -184,7 +164,8 @@ merged.drop(
     axis=1,
 )
 
-merged["trips_per_dock"] = merged["trips"] / merged["total_docks"]
+# Int64 / Int64 is a nullable Float64; the artifact stores plain float64
+merged["trips_per_dock"] = (merged["trips"] / merged["total_docks"]).astype("float64")
 
 merged = merged.rename(columns={"name_orig": "name"})
 
@@ -242,4 +223,4 @@ ut_names = [
 merged["is_ut"] = merged["name"].isin(ut_names).astype(int)
 
 # %%
-merged.to_csv("../../data/cleaned/scoring/current_stations.csv", index=False)
+save_artifact(merged, "current_stations")
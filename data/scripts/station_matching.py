@@ -0,0 +1,243 @@
+"""
+Fuzzy station-name matching between the rubric, the kiosk list and the trip
+counts.
+
+The three sources spell the same station differently ("E 11th/Waller",
+"East 11th St. & Waller", "S 1st/Riverside @ Long Center" vs "Long Center @
+South 1st & Riverside"). Each target table gets a token inverted index, so a
+query is only scored against the rows that share a token with it (blocking)
+instead of every row. Candidates are scored by:
+
+  - exact kiosk_names intersection key match (confidence 1.0)
+  - IDF-weighted overlap of the name tokens, landmark words included, so
+    "palmer" or "pfluger" count for more than "congress" or "6"
+  - Levenshtein similarity of the keys
+  - a penalty when both names carry street numbers and none agree
+  - when both sides have coordinates, proximity within PROXIMITY_SCALE_M
+
+A rubric name's parenthetical alternate ("W 7th/Congress (W 6th/Congress)")
+is scored as a second spelling. Matches are assigned one-to-one, best
+confidence first, and anything below MIN_CONFIDENCE stays unmatched for the
+manual patches in coords.py. `python station_matching.py` resolves the rubric
+against the kiosks and the trip counts in one pass and lists every row that
+is not an exact match.
+"""
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+from kiosk_names import normalize_kiosk_names
+
+MIN_CONFIDENCE = 0.6
+
+# distance at which the proximity score has fallen to 1/e
+PROXIMITY_SCALE_M = 150
+
+PARENTHETICAL = re.compile(r"\((.*?)\)")
+ORDINAL = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b")
+WORD = re.compile(r"[a-z0-9.]+")
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+# connective / road-type / direction words that carry no identity
+STOP_WORDS = {"st", "street", "ave", "dr", "drive", "rd", "ln", "at", "and", "the"}
+STOP_WORDS |= {"e", "w", "n", "s", "east", "west", "north", "south"}
+
+# abbreviations the sources use for the same landmark
+ABBREVIATIONS = {"ped": "pedestrian", "cap": "capitol", "ut": "university"}
+
+
+def name_aliases(name):
+    """A name and any parenthetical alternates: "A (B)" -> ["A", "B"]."""
+    if pd.isna(name):
+        return []
+    name = str(name)
+    return [PARENTHETICAL.sub(" ", name), *PARENTHETICAL.findall(name)]
+
+
+def name_tokens(name):
+    """Tokens of a raw name, ordinals folded to numbers, filler words dropped."""
+    name = ORDINAL.sub(r"\1", str(name).lower())
+    tokens = {ABBREVIATIONS.get(t, t) for t in WORD.findall(name)}
+    return {t.strip(".") for t in tokens - STOP_WORDS} - {""}
+
+
+def levenshtein(a, b):
+    """Edit distance between two short strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def key_similarity(a, b):
+    """1 - normalized edit distance of two intersection keys."""
+    if not a or not b:
+        return 0.0
+    return 1 - levenshtein(a, b) / max(len(a), len(b))
+
+
+def spelling_similarity(a, b):
+    """Character-level similarity of two raw names, for breaking ties."""
+    return SequenceMatcher(None, str(a).strip().lower(), str(b).strip().lower()).ratio()
+
+
+class NameIndex:
+    """Inverted token index over one table's station names (and coordinates)."""
+
+    def __init__(self, names, xy=None):
+        self.names = pd.Series(names).reset_index(drop=True)
+        self.keys = normalize_kiosk_names(self.names).tolist()
+        self.tokens = [set() if pd.isna(n) else name_tokens(n) for n in self.names]
+        self.xy = None if xy is None else np.asarray(xy, dtype="float64").reshape(-1, 2)
+
+        self.postings = defaultdict(set)
+        for pos, tokens in enumerate(self.tokens):
+            for token in tokens:
+                self.postings[token].add(pos)
+        n = max(len(self.names), 1)
+        self.idf = {t: np.log(1 + n / len(p)) for t, p in self.postings.items()}
+        self.unseen_idf = np.log(1 + n)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, tokens):
+        """Rows sharing at least one token with `tokens`."""
+        hits = set()
+        for token in tokens:
+            hits |= self.postings.get(token, set())
+        return hits
+
+    def weight(self, tokens):
+        return sum(self.idf.get(t, self.unseen_idf) for t in tokens)
+
+    def overlap(self, a, b):
+        """
+        IDF-weighted token overlap: the mean of the Dice coefficient and the
+        containment of the smaller set, so "Palmer Auditorium" still scores
+        well against "Barton Springs/Bouldin @ Palmer Auditorium".
+        """
+        wa, wb = self.weight(a), self.weight(b)
+        if not wa or not wb:
+            return 0.0
+        shared = self.weight(a & b)
+        return (2 * shared / (wa + wb) + shared / min(wa, wb)) / 2
+
+
+def score_pair(key, tokens, xy, index, pos):
+    """Confidence in [0, 1] that a query alias and `index` row `pos` are one station."""
+    if key and key == index.keys[pos]:
+        return 1.0
+
+    target = index.tokens[pos]
+    score = 0.75 * index.overlap(tokens, target) + 0.25 * key_similarity(
+        key, index.keys[pos]
+    )
+    # numbered streets that differ ("8th" vs "6th") are different corners
+    numbers, target_numbers = (
+        set(filter(NUMBER.fullmatch, tokens)),
+        set(filter(NUMBER.fullmatch, target)),
+    )
+    if numbers and target_numbers and not numbers & target_numbers:
+        score *= 0.5
+    if xy is not None and index.xy is not None:
+        dist = np.hypot(*(index.xy[pos] - xy))
+        score = 0.7 * score + 0.3 * np.exp(-dist / PROXIMITY_SCALE_M)
+    return float(score)
+
+
+def match_names(query_names, index, query_xy=None, min_confidence=MIN_CONFIDENCE):
+    """
+    Best one-to-one match in `index` for each query name.
+
+    Returns a DataFrame aligned with `query_names` with the matched row
+    (`pos`, -1 when unmatched), its name and the confidence. Pairs are
+    assigned greedily from the highest confidence down, so two queries
+    never claim the same row.
+    """
+    query_names = pd.Series(query_names)
+    if query_xy is not None:
+        query_xy = np.asarray(query_xy, dtype="float64").reshape(-1, 2)
+
+    pairs = []
+    for q, name in enumerate(query_names):
+        aliases = name_aliases(name)
+        keys = normalize_kiosk_names(pd.Series(aliases, dtype=object)).tolist()
+        q_xy = None if query_xy is None else query_xy[q]
+        best = {}
+        for alias, key in zip(aliases, keys):
+            if not key:
+                continue
+            tokens = name_tokens(alias)
+            for pos in index.candidates(tokens):
+                conf = score_pair(key, tokens, q_xy, index, pos)
+                spelling = spelling_similarity(alias, index.names[pos])
+                best[pos] = max((conf, spelling), best.get(pos, (0.0, 0.0)))
+        pairs.extend(
+            (conf, spelling, q, pos)
+            for pos, (conf, spelling) in best.items()
+            if conf >= min_confidence
+        )
+
+    match_pos = np.full(len(query_names), -1)
+    confidence = np.zeros(len(query_names))
+    taken = set()
+    # ties (several rows with the same key) go to the closest spelling
+    for conf, _, q, pos in sorted(pairs, key=lambda p: (-p[0], -p[1], p[2], p[3])):
+        if match_pos[q] == -1 and pos not in taken:
+            match_pos[q], confidence[q] = pos, conf
+            taken.add(pos)
+
+    matched = match_pos >= 0
+    names = np.full(len(query_names), None, dtype=object)
+    names[matched] = index.names.to_numpy()[match_pos[matched]]
+    return pd.DataFrame(
+        {"pos": match_pos, "name": names, "confidence": confidence.round(3)},
+        index=query_names.index,
+    )
+
+
+def resolve_sources(query_names, targets, query_xy=None, min_confidence=MIN_CONFIDENCE):
+    """
+    Match `query_names` against every target table at once.
+
+    `targets` maps a source name to a NameIndex. Returns one row per query
+    with `{source}_pos`, `{source}_name` and `{source}_confidence` columns.
+    """
+    out = pd.DataFrame(index=pd.Series(query_names).index)
+    for source, index in targets.items():
+        matched = match_names(query_names, index, query_xy, min_confidence)
+        out = out.join(matched.add_prefix(f"{source}_"))
+    return out
+
+
+if __name__ == "__main__":
+    # one pass over all three sources: every rubric row against the active
+    # kiosks and the trip counts, with the confidence of each match
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.max_columns", None)
+    pd.set_option("display.width", 200)
+
+    rubric = pd.read_excel("../raw/scoring/curr_station_rubric.xlsx", header=2)
+    rubric = rubric[normalize_kiosk_names(rubric["name"]).ne("")]
+    kiosks = pd.read_csv("../raw/coords/kiosk_locations.csv")
+    kiosks = kiosks[kiosks["Kiosk Status"].astype(str).str.lower() == "active"]
+    trips = pd.read_csv("../raw/scoring/tips_per_station.csv")
+
+    resolved = resolve_sources(
+        rubric["name"],
+        {"kiosks": NameIndex(kiosks["Kiosk Name"]), "trips": NameIndex(trips["name"])},
+    )
+    resolved.insert(0, "name", rubric["name"])
+    review = resolved[
+        (resolved["kiosks_confidence"] < 1) | (resolved["trips_confidence"] < 1)
+    ]
+    print(review.drop(columns=["kiosks_pos", "trips_pos"]))
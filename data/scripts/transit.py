@@ -1,6 +1,5 @@
-from pathlib import Path
-
 import pandas as pd
+from artifacts import save_artifact
 
 pd.set_option("display.max_rows", None)
 pd.set_option("display.max_columns", None)
@@ -75,7 +74,4 @@ rail_and_bus.columns = ["name", "lat", "lon", "type"]
 
 rail_and_bus["name"] = clean_names(rail_and_bus["name"])
 
-out_dir = Path("../cleaned/transit")
-out_dir.mkdir(parents=True, exist_ok=True)
-
-rail_and_bus.to_csv(out_dir / "transit.csv", index=False)
+save_artifact(rail_and_bus, "transit")
@@ -0,0 +1,346 @@
+"""
+County-wide candidate-site heatmap.
+
+Lays a regular grid (50 m by default) over the Travis County bounding box in
+UTM 14N, computes the v5 location features for every cell centre inside the
+county boundary (from the cached OSM extract) with
+`compute_station_features`, and predicts trips per dock with the models/v4.py
+XGBoost specification. ml_dataset_v4 is scaled with a different feature
+set, so the spec is fit on the unscaled v5 station table using only the
+features a grid cell has: the location features, without the rubric scores
+and the is_ut interactions. The fitted model is kept in the model registry
+(models/registry.py) as "candidate_grid" and only refit when the table, the
+feature list or the parameters change.
+
+Outputs, in data/predictions/:
+  - candidate_grid_trips_per_dock.tif: float32 GeoTIFF, EPSG:26914; cells
+    outside the county are nodata
+  - candidate_sites.csv: the top-N cells, at least --min-spacing-m apart
+    from each other and from existing stations
+
+The raster is processed in blocks of whole rows (about --chunk-size cells)
+across --workers processes and each block is written to the GeoTIFF as soon
+as it is predicted, so memory stays bounded by workers x chunk size no
+matter how fine the grid is.
+
+    python candidate_grid.py --resolution-m 50 --workers 8 --top-n 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import rasterio
+import shapely
+from affine import Affine
+from rasterio.windows import Window
+from registry import fit_or_load, model_key
+from xgb_params import XGB_V4_PARAMS
+from xgboost import XGBRegressor
+
+sys.path.append("../data/scripts")
+sys.path.append("../data/scripts/combined_datasets")
+
+from artifacts import load_artifact
+from osm_extract import county_boundary
+from park_features import load_parks
+from projection import (
+    METRIC_CRS,
+    project_geometries_to_metric,
+    project_to_metric,
+    unproject_from_metric,
+)
+from station_features import (
+    STATION_FEATURE_COLUMNS,
+    compute_station_features,
+    job_segment_columns,
+)
+
+CLEANED_DIR = Path("../data/cleaned")
+TRAINING_TABLE = CLEANED_DIR / "combined_datasets/v5/combined_dataset_v5.csv"
+OUTPUT_DIR = Path("../data/predictions")
+
+# (south, west, north, east) of Travis County, TX
+TRAVIS_COUNTY_BOUNDS = (30.02, -98.18, 30.63, -97.36)
+
+# Raster value of cells outside the county boundary
+NODATA = -9999.0
+
+# Everything a grid cell can be given: no rubric scores, and is_ut is unknown
+MODEL_FEATURES = [col for col in STATION_FEATURE_COLUMNS if not col.startswith("ut_x_")]
+
+# Columns carried into the candidate table besides the prediction
+CANDIDATE_COLUMNS = [
+    "lat",
+    "lon",
+    "nearest_station_dist_m",
+    "transit_nearby",
+    "jobs_nearby_275m",
+    "housing_nearby_275m",
+    "retail_nearby",
+]
+
+
+def load_sources():
+    """The cleaned tables compute_station_features needs, plus the stations."""
+    sources = {
+        name: load_artifact(name)
+        for name in [
+            "transit",
+            "jobs",
+            "housing",
+            "amenities",
+            "retail",
+            "dining_halls",
+            "dorms",
+            "ut_hotspots",
+            "wampus_hotspots",
+        ]
+    }
+    sources["parks"] = load_parks(CLEANED_DIR / "amenities")
+
+    coords = load_artifact("coords", columns=["scoring_name", "lat", "lon"])
+    stations = load_artifact("current_stations").merge(
+        coords, left_on="name", right_on="scoring_name", how="left"
+    )
+    sources["stations"] = stations.dropna(subset=["lat", "lon"]).reset_index(drop=True)
+    return sources
+
+
+def model_features(jobs):
+    """MODEL_FEATURES plus the jobs_{segment}_{r}m columns `jobs` provides."""
+    return MODEL_FEATURES + job_segment_columns(jobs)[1]
+
+
+def train_model(features=MODEL_FEATURES):
+    """
+    The v4 XGBoost spec fit on `features` of the v5 station table (log1p
+    target), from the model registry if this table / feature list / params
+    were fit before.
+    """
+    stations = pd.read_csv(TRAINING_TABLE)
+    return fit_or_load(
+        "candidate_grid",
+        lambda: XGBRegressor(**XGB_V4_PARAMS),
+        stations[features],
+        np.log1p(stations["trips_per_dock"]),
+        XGB_V4_PARAMS,
+        TRAINING_TABLE,
+    )
+
+
+def registry_key(features=MODEL_FEATURES):
+    """Registry key of the model train_model(features) loads or registers."""
+    return model_key(TRAINING_TABLE, features, XGB_V4_PARAMS)
+
+
+class Grid:
+    """Cell-centre grid over a lat/lon bounding box, in metric coordinates."""
+
+    def __init__(self, bounds, resolution_m, crs=METRIC_CRS):
+        south, west, north, east = bounds
+        x, y = project_to_metric(
+            [south, south, north, north], [west, east, west, east], crs
+        )
+        self.resolution_m = resolution_m
+        self.crs = crs
+        self.x0 = float(np.floor(min(x) / resolution_m) * resolution_m)
+        self.y0 = float(np.ceil(max(y) / resolution_m) * resolution_m)
+        self.ncols = int(np.ceil((max(x) - self.x0) / resolution_m))
+        self.nrows = int(np.ceil((self.y0 - min(y)) / resolution_m))
+
+    @property
+    def transform(self):
+        res = self.resolution_m
+        return Affine(res, 0.0, self.x0, 0.0, -res, self.y0)
+
+    def __len__(self):
+        return self.nrows * self.ncols
+
+    def row_blocks(self, chunk_size):
+        """(first row, row count) blocks of about chunk_size cells each."""
+        rows_per_block = max(1, chunk_size // self.ncols)
+        for row0 in range(0, self.nrows, rows_per_block):
+            yield row0, min(rows_per_block, self.nrows - row0)
+
+    def cell_xy(self, row0, nrows):
+        """Metric x / y of every cell centre in a row block, row-major."""
+        xs = self.x0 + (np.arange(self.ncols) + 0.5) * self.resolution_m
+        ys = self.y0 - (np.arange(row0, row0 + nrows) + 0.5) * self.resolution_m
+        x, y = np.meshgrid(xs, ys)
+        return x.ravel(), y.ravel()
+
+    def cell_centres(self, row0, nrows):
+        """lat / lon of every cell centre in a row block, row-major."""
+        return unproject_from_metric(*self.cell_xy(row0, nrows), self.crs)
+
+
+def load_boundary(crs=METRIC_CRS):
+    """Travis County polygon in `crs`, prepared for point-in-polygon tests."""
+    boundary = project_geometries_to_metric([county_boundary()], crs)[0]
+    shapely.prepare(boundary)
+    return boundary
+
+
+# Per-process state for the worker pool
+_worker = {}
+
+
+def _init_worker(model, features, grid, boundary, chunk_size, pool_size):
+    shapely.prepare(boundary)
+    _worker.update(
+        model=model,
+        features=features,
+        grid=grid,
+        boundary=boundary,
+        chunk_size=chunk_size,
+        pool_size=pool_size,
+        sources=load_sources(),
+    )
+
+
+def _predict_block(block):
+    """
+    Predictions for one row block plus its best cells as candidates. Cells
+    outside the county are left at NODATA and never become candidates.
+    """
+    row0, nrows = block
+    grid = _worker["grid"]
+
+    x, y = grid.cell_xy(row0, nrows)
+    inside = shapely.contains_xy(_worker["boundary"], x, y)
+    pred = np.full(len(x), NODATA, dtype="float32")
+    if not inside.any():
+        candidates = pd.DataFrame(
+            columns=["predicted_trips_per_dock", *CANDIDATE_COLUMNS]
+        )
+        return row0, pred.reshape(nrows, grid.ncols), candidates
+
+    lat, lon = unproject_from_metric(x[inside], y[inside], grid.crs)
+    features = compute_station_features(
+        np.column_stack([lat, lon]),
+        _worker["sources"],
+        chunk_size=_worker["chunk_size"],
+    )
+    log_pred = _worker["model"].predict(features[_worker["features"]].to_numpy())
+    pred[inside] = np.expm1(log_pred)
+
+    top = np.argsort(pred[inside])[::-1][: _worker["pool_size"]]
+    candidates = features.iloc[top][CANDIDATE_COLUMNS].copy()
+    candidates.insert(0, "predicted_trips_per_dock", pred[inside][top])
+    return row0, pred.reshape(nrows, grid.ncols), candidates
+
+
+def pick_candidates(pool, top_n, min_spacing_m):
+    """
+    Greedy top-N: best predictions first, skipping cells within
+    min_spacing_m of an existing station or an already-picked cell.
+    """
+    pool = pool[pool["nearest_station_dist_m"] >= min_spacing_m]
+    pool = pool.sort_values("predicted_trips_per_dock", ascending=False)
+    xy = np.column_stack(project_to_metric(pool["lat"], pool["lon"]))
+
+    picked = []
+    for pos in range(len(pool)):
+        if len(picked) == top_n:
+            break
+        dists = np.hypot(*(xy[picked] - xy[pos]).T)
+        if (dists >= min_spacing_m).all():
+            picked.append(pos)
+
+    out = pool.iloc[picked].reset_index(drop=True)
+    out.insert(0, "rank", np.arange(1, len(out) + 1))
+    return out
+
+
+def run(resolution_m, chunk_size, workers, top_n, min_spacing_m, bounds):
+    start = time.perf_counter()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    grid = Grid(bounds, resolution_m)
+    boundary = load_boundary(grid.crs)
+    blocks = list(grid.row_blocks(chunk_size))
+    print(
+        f"{grid.nrows} x {grid.ncols} grid ({len(grid):,} cells at "
+        f"{resolution_m} m) in {len(blocks)} blocks on {workers} workers"
+    )
+
+    features = model_features(load_artifact("jobs"))
+    model = train_model(features)
+    pool_size = 20 * top_n
+
+    raster_path = OUTPUT_DIR / "candidate_grid_trips_per_dock.tif"
+    profile = {
+        "driver": "GTiff",
+        "width": grid.ncols,
+        "height": grid.nrows,
+        "count": 1,
+        "dtype": "float32",
+        "crs": grid.crs,
+        "transform": grid.transform,
+        "compress": "deflate",
+        "predictor": 3,
+        "nodata": NODATA,
+    }
+
+    candidate_pool = []
+    with (
+        rasterio.open(raster_path, "w", **profile) as dst,
+        ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model, features, grid, boundary, chunk_size, pool_size),
+        ) as executor,
+    ):
+        for done, (row0, pred, candidates) in enumerate(
+            executor.map(_predict_block, blocks), start=1
+        ):
+            dst.write(pred, 1, window=Window(0, row0, grid.ncols, pred.shape[0]))
+            if not candidates.empty:
+                candidate_pool.append(candidates)
+            print(f"block {done}/{len(blocks)} ({time.perf_counter() - start:.0f}s)")
+
+    top = pick_candidates(
+        pd.concat(candidate_pool, ignore_index=True), top_n, min_spacing_m
+    )
+    top.to_csv(OUTPUT_DIR / "candidate_sites.csv", index=False)
+
+    print(f"Saved: {raster_path}")
+    print(f"Saved: {OUTPUT_DIR / 'candidate_sites.csv'}")
+    print(top.head(10))
+    print(f"Done in {time.perf_counter() - start:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--resolution-m", type=float, default=50)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--min-spacing-m", type=float, default=300)
+    parser.add_argument(
+        "--bounds",
+        type=float,
+        nargs=4,
+        default=TRAVIS_COUNTY_BOUNDS,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+    )
+    args = parser.parse_args(argv)
+
+    run(
+        args.resolution_m,
+        args.chunk_size,
+        args.workers,
+        args.top_n,
+        args.min_spacing_m,
+        tuple(args.bounds),
+    )
+
+
+if __name__ == "__main__":
+    main()
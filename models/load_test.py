@@ -0,0 +1,124 @@
+"""
+Load test for serve.py: posts batches of random pins and reports latency.
+
+Each client thread keeps one HTTP connection open and sends --requests
+batches of --batch-size points drawn uniformly from --bounds. End-to-end
+latency (request sent to response read) and the server's own compute time
+(its Server-Timing header) are reported as p50 / p90 / p99 / max.
+
+    python serve.py &
+    python load_test.py --batch-size 1000 --requests 200
+"""
+
+import argparse
+import http.client
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# (south, west, north, east): central Austin, where the stations are
+AUSTIN_CORE_BOUNDS = (30.22, -97.80, 30.32, -97.69)
+
+SERVER_TIMING = re.compile(r"compute;dur=([\d.]+)")
+
+
+def random_batches(n_batches, batch_size, bounds, seed):
+    south, west, north, east = bounds
+    rng = np.random.default_rng(seed)
+    for _ in range(n_batches):
+        lat = rng.uniform(south, north, batch_size).round(6)
+        lon = rng.uniform(west, east, batch_size).round(6)
+        yield json.dumps({"lat": lat.tolist(), "lon": lon.tolist()})
+
+
+def run_client(url, bodies):
+    """(end-to-end ms, server compute ms) per request, over one connection."""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    timings = []
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            conn.request("POST", parts.path, body, headers)
+            response = conn.getresponse()
+            payload = response.read()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status != 200:
+                raise RuntimeError(
+                    f"{response.status} {response.reason}: {payload[:200]}"
+                )
+
+            match = SERVER_TIMING.search(response.getheader("Server-Timing", ""))
+            timings.append((elapsed_ms, float(match.group(1)) if match else np.nan))
+    finally:
+        conn.close()
+    return timings
+
+
+def summarize(ms):
+    ms = np.asarray(ms)
+    return {
+        "p50": np.percentile(ms, 50),
+        "p90": np.percentile(ms, 90),
+        "p99": np.percentile(ms, 99),
+        "max": ms.max(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8765/predict")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--bounds",
+        type=float,
+        nargs=4,
+        default=AUSTIN_CORE_BOUNDS,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+    )
+    args = parser.parse_args(argv)
+
+    warmup = random_batches(args.warmup, args.batch_size, args.bounds, args.seed)
+    run_client(args.url, warmup)
+
+    per_client = [
+        list(
+            random_batches(
+                args.requests, args.batch_size, args.bounds, args.seed + 1 + client
+            )
+        )
+        for client in range(args.clients)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(
+            pool.map(lambda bodies: run_client(args.url, bodies), per_client)
+        )
+    wall_s = time.perf_counter() - start
+
+    timings = np.array([t for client in results for t in client])
+    n_requests = len(timings)
+    print(
+        f"{n_requests} requests x {args.batch_size} points from {args.clients} "
+        f"client(s) in {wall_s:.1f}s: {n_requests / wall_s:.1f} req/s, "
+        f"{n_requests * args.batch_size / wall_s:,.0f} points/s"
+    )
+    for label, column in [("end-to-end", 0), ("server compute", 1)]:
+        stats = summarize(timings[:, column])
+        print(
+            f"{label:15s} "
+            + "  ".join(f"{name} {value:7.1f} ms" for name, value in stats.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+On-disk registry of fitted models, so batch scoring and the candidate-site
+workflows load a model instead of refitting it.
+
+Every entry lives in REGISTRY_DIR/<name>/<key>/, where the key combines:
+
+  - the dataset version: a content hash of the table the model was fit on
+  - a hash of the ordered feature list
+  - a hash of the hyperparameters
+
+so changing any of them registers a new entry instead of silently reusing
+a stale one. XGBoost models are stored in xgboost's native UBJSON format
+(model.ubj) and anything else with joblib, uncompressed so its numpy arrays
+can be memory-mapped on load (model.joblib). meta.json next to the model
+records the key parts, the feature list, the parameters, library versions
+and any metrics passed in; <name>/LATEST names the most recent key.
+
+    python registry.py v4 v5          # fit train.MODEL_SPECS on all rows
+    python registry.py --list
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import joblib
+import sklearn
+import xgboost
+from xgboost import XGBModel, XGBRegressor
+
+REGISTRY_DIR = Path(__file__).resolve().parent / "registry"
+
+
+def _short_hash(data):
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+def dataset_version(path):
+    """Content hash of a dataset file."""
+    return _short_hash(Path(path).read_bytes())
+
+
+def feature_hash(features):
+    return _short_hash("\n".join(features).encode())
+
+
+def params_hash(params):
+    return _short_hash(json.dumps(params, sort_keys=True, default=str).encode())
+
+
+def model_key(dataset, features, params):
+    """Registry key for a model fit on `dataset` (a version hash or a path)."""
+    if Path(str(dataset)).exists():
+        dataset = dataset_version(dataset)
+    return f"{dataset}-{feature_hash(features)}-{params_hash(params)}"
+
+
+def save_model(name, model, features, params, dataset_path, metrics=None):
+    """Register a fitted model under `name`; returns its key."""
+    version = dataset_version(dataset_path)
+    key = model_key(version, features, params)
+    entry = REGISTRY_DIR / name / key
+    entry.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(model, XGBModel):
+        model_file = "model.ubj"
+        model.save_model(entry / model_file)
+    else:
+        model_file = "model.joblib"
+        joblib.dump(model, entry / model_file)
+
+    meta = {
+        "name": name,
+        "key": key,
+        "estimator": f"{type(model).__module__}.{type(model).__name__}",
+        "model_file": model_file,
+        "dataset": str(dataset_path),
+        "dataset_version": version,
+        "features": list(features),
+        "params": params,
+        "metrics": metrics or {},
+        "versions": {"xgboost": xgboost.__version__, "sklearn": sklearn.__version__},
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+    (entry / "meta.json").write_text(json.dumps(meta, indent=2, default=str) + "\n")
+    (REGISTRY_DIR / name / "LATEST").write_text(key + "\n")
+    return key
+
+
+def model_info(version, key=None):
+    """meta.json of a registered model (the latest one unless `key` is given)."""
+    root = REGISTRY_DIR / version
+    if key is None:
+        latest = root / "LATEST"
+        if not latest.exists():
+            raise FileNotFoundError(
+                f"no model registered as {version!r} in {REGISTRY_DIR}; "
+                f"run `python registry.py {version}`"
+            )
+        key = latest.read_text().strip()
+    return json.loads((root / key / "meta.json").read_text())
+
+
+def load_model(version, key=None, mmap_mode="r"):
+    """
+    A registered model, ready to predict; its feature list is in
+    `model_info(version, key)["features"]`. joblib models are loaded with
+    `mmap_mode` so their arrays are mapped rather than copied.
+    """
+    meta = model_info(version, key)
+    path = REGISTRY_DIR / version / meta["key"] / meta["model_file"]
+    if meta["model_file"].endswith(".ubj"):
+        model = XGBRegressor()
+        model.load_model(path)
+        return model
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def fit_or_load(name, build, X, y, params, dataset_path, metrics=None):
+    """
+    The model registered under `name` for this dataset version, feature
+    list and params, fitting and registering `build()` on X, y first if
+    there is none.
+    """
+    features = list(X.columns)
+    key = model_key(dataset_path, features, params)
+    if (REGISTRY_DIR / name / key / "meta.json").exists():
+        return load_model(name, key)
+    model = build().fit(X, y)
+    save_model(name, model, features, params, dataset_path, metrics)
+    return model
+
+
+def register_specs(names):
+    """Fit train.MODEL_SPECS entries on all rows and register them."""
+    from train import MODEL_SPECS, dataset_path, load_dataset
+
+    for name in names:
+        spec = MODEL_SPECS[name]
+        _, X, y = load_dataset(name)
+        path = dataset_path(spec.dataset)
+        start = time.perf_counter()
+        fit_or_load(name, spec.build, X, y, spec.params, path)
+        fit_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_model(name)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{name}: {model_info(name)['key']}  fit/lookup {fit_s:.2f}s  "
+            f"load {load_ms:.1f}ms"
+        )
+
+
+def list_models():
+    for latest in sorted(REGISTRY_DIR.glob("*/LATEST")):
+        meta = model_info(latest.parent.name)
+        print(
+            f"{meta['name']:15s} {meta['key']}  {meta['estimator']}  "
+            f"{len(meta['features'])} features  {meta['created']}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("versions", nargs="*")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.versions:
+        register_specs(args.versions)
+    if args.list or not args.versions:
+        list_models()
+
+
+if __name__ == "__main__":
+    main()
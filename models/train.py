@@ -0,0 +1,260 @@
+"""
+Shared training harness for the model variants in models/v1.py - v5.py.
+
+Every variant was the same flow copied between notebooks: load
+ml_dataset_vN, optionally log1p the trips_per_dock target, K-fold
+cross-validate, then fit a train/test split and report metrics in original
+units. Each MODEL_SPECS entry captures what differs (dataset version,
+columns, target transform, estimator and parameters, fold count, split
+seed), and `evaluate` runs the CV folds and the holdout fit of any number
+of variants as independent tasks in one process pool.
+
+Workers are limited to one BLAS / OpenMP thread with threadpoolctl and
+their estimators get n_jobs=1 (nthread=1 for XGBoost), so `--workers N`
+uses N cores instead of N x cores threads fighting over them.
+
+Metrics go to METRICS_PATH as JSON, one entry per variant; entries for
+variants not in this run are kept.
+
+    python train.py                   # every variant
+    python train.py v4 v5 --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from threadpoolctl import threadpool_limits
+from tuning import V1_FEATURES
+from xgb_params import XGB_V1_PARAMS, XGB_V3_PARAMS, XGB_V4_PARAMS
+from xgboost import XGBRegressor
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "data/cleaned/combined_datasets"
+METRICS_PATH = Path(__file__).resolve().parent / "metrics" / "model_metrics.json"
+
+TARGET = "trips_per_dock"
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    dataset: int
+    estimator: type
+    params: dict
+    # feature columns: `features` if given, else everything but `drop`
+    features: tuple = ()
+    drop: tuple = ("name", "lat", "lon")
+    log_target: bool = True
+    n_splits: int = 5
+    test_seed: int = 42
+    test_size: float = 0.2
+    cv_seed: int = 42
+
+    def build(self):
+        """Unfitted estimator, single-threaded."""
+        return self.estimator(**self.params, n_jobs=1)
+
+    def cv(self):
+        return KFold(n_splits=self.n_splits, shuffle=True, random_state=self.cv_seed)
+
+
+MODEL_SPECS = {
+    "v1": ModelSpec(
+        dataset=1,
+        estimator=XGBRegressor,
+        params=XGB_V1_PARAMS,
+        features=tuple(V1_FEATURES),
+        log_target=False,
+        n_splits=10,
+    ),
+    "v2": ModelSpec(
+        dataset=2,
+        estimator=RandomForestRegressor,
+        params={
+            "n_estimators": 300,
+            "max_depth": 6,
+            "min_samples_split": 4,
+            "min_samples_leaf": 2,
+            "max_features": "sqrt",
+            "random_state": 42,
+        },
+        drop=("name",),
+    ),
+    "v3": ModelSpec(dataset=3, estimator=XGBRegressor, params=XGB_V3_PARAMS),
+    "v4": ModelSpec(
+        dataset=4, estimator=XGBRegressor, params=XGB_V4_PARAMS, test_seed=21
+    ),
+    # the v4 specification on the v5 feature table
+    "v5": ModelSpec(
+        dataset=5, estimator=XGBRegressor, params=XGB_V4_PARAMS, test_seed=21
+    ),
+}
+
+
+def dataset_path(version):
+    return DATASET_DIR / f"v{version}" / f"ml_dataset_v{version}.csv"
+
+
+@cache
+def load_dataset(name):
+    """(full table, X, y) for MODEL_SPECS[name], y log1p'd if the spec says so."""
+    spec = MODEL_SPECS[name]
+    df = pd.read_csv(dataset_path(spec.dataset))
+    if spec.features:
+        X = df[list(spec.features)]
+    else:
+        X = df.drop(columns=[TARGET, *spec.drop], errors="ignore")
+    y = np.log1p(df[TARGET]) if spec.log_target else df[TARGET]
+    return df, X, y
+
+
+def regression_metrics(y_true, y_pred):
+    return {
+        "r2": float(r2_score(y_true, y_pred)),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+    }
+
+
+def fit_and_score(name, train, test):
+    """
+    Fit MODEL_SPECS[name] on rows `train` and score it on rows `test`, in
+    model units (log1p for log-target specs) and in trips per dock.
+    """
+    spec = MODEL_SPECS[name]
+    _, X, y = load_dataset(name)
+    model = spec.build().fit(X.iloc[train], y.iloc[train])
+    pred = model.predict(X.iloc[test])
+
+    scores = {"model_units": regression_metrics(y.iloc[test], pred)}
+    if spec.log_target:
+        scores["original_units"] = regression_metrics(
+            np.expm1(y.iloc[test]), np.expm1(pred)
+        )
+    else:
+        scores["original_units"] = scores["model_units"]
+    return scores
+
+
+def holdout_split(name):
+    """Row positions of the spec's train/test split."""
+    spec = MODEL_SPECS[name]
+    _, X, _ = load_dataset(name)
+    return train_test_split(
+        np.arange(len(X)), test_size=spec.test_size, random_state=spec.test_seed
+    )
+
+
+def _single_thread():
+    threadpool_limits(limits=1)
+
+
+def _summarize(fold_scores):
+    out = {}
+    for units in fold_scores[0]:
+        out[units] = {}
+        for metric in fold_scores[0][units]:
+            values = np.array([s[units][metric] for s in fold_scores])
+            out[units][metric] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "folds": values.round(6).tolist(),
+            }
+    return out
+
+
+def evaluate(names, workers=None):
+    """
+    CV folds and the holdout fit of every variant in `names`, all run as
+    separate tasks in one process pool. Returns {name: metrics dict}.
+
+    With workers=1 the tasks run in this process instead, so scripts can
+    call it at the top level without an `if __name__ == "__main__"` guard
+    (a spawned pool re-imports the caller's main module).
+    """
+    workers = workers or os.cpu_count()
+    tasks = []
+    for name in names:
+        spec = MODEL_SPECS[name]
+        _, X, _ = load_dataset(name)
+        for fold, (train, test) in enumerate(spec.cv().split(X)):
+            tasks.append((name, fold, train, test))
+        tasks.append((name, "holdout", *holdout_split(name)))
+
+    start = time.perf_counter()
+    if workers == 1:
+        with threadpool_limits(limits=1):
+            results = [fit_and_score(name, tr, te) for name, _, tr, te in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_single_thread
+        ) as pool:
+            futures = [
+                pool.submit(fit_and_score, name, tr, te) for name, _, tr, te in tasks
+            ]
+            results = [f.result() for f in futures]
+
+    metrics = {}
+    for name in names:
+        spec = MODEL_SPECS[name]
+        _, X, _ = load_dataset(name)
+        scores = [r for (n, _, _, _), r in zip(tasks, results) if n == name]
+        metrics[name] = {
+            "dataset": f"ml_dataset_v{spec.dataset}",
+            "estimator": spec.estimator.__name__,
+            "params": spec.params,
+            "log_target": spec.log_target,
+            "n_samples": len(X),
+            "n_features": X.shape[1],
+            "cv": {"n_splits": spec.n_splits, **_summarize(scores[:-1])},
+            "holdout": {"test_seed": spec.test_seed, **scores[-1]},
+        }
+    print(
+        f"{len(tasks)} fits on {workers} workers in {time.perf_counter() - start:.1f}s"
+    )
+    return metrics
+
+
+def write_metrics(metrics, path=METRICS_PATH):
+    """Merge `metrics` into the JSON at `path`, replacing those variants."""
+    path = Path(path)
+    existing = json.loads(path.read_text()) if path.exists() else {}
+    existing.update(metrics)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(sorted(existing.items())), indent=2) + "\n")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("versions", nargs="*", default=list(MODEL_SPECS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metrics", default=METRICS_PATH)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.versions) - set(MODEL_SPECS)
+    if unknown:
+        parser.error(f"unknown versions {sorted(unknown)}, have {list(MODEL_SPECS)}")
+
+    metrics = evaluate(args.versions, args.workers)
+    for name, m in metrics.items():
+        cv, holdout = m["cv"]["model_units"], m["holdout"]["original_units"]
+        print(
+            f"{name}: CV R² {cv['r2']['mean']:.3f} ± {cv['r2']['std']:.3f}  "
+            f"holdout R² {holdout['r2']:.3f}  MAE {holdout['mae']:.3f}  "
+            f"RMSE {holdout['rmse']:.3f}  ({m['estimator']}, {m['n_features']} features)"
+        )
+    print("->", write_metrics(metrics, args.metrics))
+
+
+if __name__ == "__main__":
+    main()
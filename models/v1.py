@@ -1,62 +1,27 @@
 # %%
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import GridSearchCV, KFold, cross_val_score
-from xgboost import XGBRegressor
+from sklearn.model_selection import train_test_split
+from train import MODEL_SPECS, evaluate, load_dataset
 
 # %%
-df = pd.read_csv("../data/cleaned/combined_datasets/v1/ml_dataset_v1.csv")
-
-feature_cols = [
-    "total_docks",
-    "ebs_station",
-    "transit_nearby",
-    "jobs_nearby",
-    "housing_nearby",
-    "low_income_access_score",
-    "amenities_nearby",
-    "park_area_nearby",
-    "bike_infra_score",
-    "retail_nearby",
-    "nearest_station_dist_m",
-    "stations_within_500m",
-    "is_ut",
-]
-
-X = df[feature_cols]
-y = df["trips_per_dock"]
+# V1_FEATURES and the raw trips_per_dock target, as specified in
+# train.MODEL_SPECS; XGB_V1_PARAMS were picked by tuning.py's successive
+# halving (python tuning.py to re-tune)
+spec = MODEL_SPECS["v1"]
+df, X, y = load_dataset("v1")
 
-# %%
-kf = KFold(n_splits=10, shuffle=True, random_state=42)
-
-xgb = XGBRegressor(objective="reg:squarederror", random_state=42)
-
-param_grid = {
-    "n_estimators": [100, 200, 300],
-    "max_depth": [2, 3, 4, 5],
-    "learning_rate": [0.01, 0.05, 0.1],
-    "subsample": [0.8, 1.0],
-    "colsample_bytree": [0.8, 1.0],
-    "min_child_weight": [1, 3, 5],
-}
-
-grid = GridSearchCV(
-    estimator=xgb, param_grid=param_grid, cv=kf, scoring="r2", n_jobs=-1
-)
+best_xgb = spec.build()
 
-grid.fit(X, y)
-best_xgb = grid.best_estimator_
-
-print("Best Parameters:")
-print(grid.best_params_)
-print(f"Best CV R²: {grid.best_score_:.3f}")
+print("Parameters:")
+print(spec.params)
 
 # %%
-r2_scores = cross_val_score(best_xgb, X, y, cv=kf, scoring="r2")
-mae_scores = -cross_val_score(best_xgb, X, y, cv=kf, scoring="neg_mean_absolute_error")
-rmse_scores = np.sqrt(
-    -cross_val_score(best_xgb, X, y, cv=kf, scoring="neg_mean_squared_error")
-)
+# 10-fold CV from the training harness, in this process
+cv_results = evaluate(["v1"], workers=1)["v1"]["cv"]["model_units"]
+r2_scores = np.array(cv_results["r2"]["folds"])
+mae_scores = np.array(cv_results["mae"]["folds"])
+rmse_scores = np.array(cv_results["rmse"]["folds"])
 
 print("\n10-Fold XGBoost Results")
 print("-" * 40)
@@ -128,17 +93,11 @@ plt.tight_layout()
 plt.show()
 
 # %%
-df = pd.read_csv("../data/cleaned/combined_datasets/v1/ml_dataset_v1.csv")
-
-# only do this if station names are in the file
-# if not, ignore this section
-
-X = df[feature_cols]
-y = df["trips_per_dock"]
-names = df["name"]  # only if this column exists
+# the spec's holdout split
+names = df["name"]
 
 X_train, X_test, y_train, y_test, names_train, names_test = train_test_split(
-    X, y, names, test_size=0.2, random_state=42
+    X, y, names, test_size=spec.test_size, random_state=spec.test_seed
 )
 
 best_xgb.fit(X_train, y_train)
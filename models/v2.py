@@ -2,47 +2,34 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import KFold, cross_validate, train_test_split
+from sklearn.model_selection import train_test_split
+from train import MODEL_SPECS, evaluate, load_dataset
 
 # %%
-df = pd.read_csv("../data/cleaned/combined_datasets/v2/ml_dataset_v2.csv")
-
-X = df.drop(columns=["trips_per_dock", "name"])
-y = np.log1p(df["trips_per_dock"])
+spec = MODEL_SPECS["v2"]
+df, X, y = load_dataset("v2")
 
 # %%
-kf = KFold(n_splits=5, shuffle=True, random_state=42)
-
-rf_model = RandomForestRegressor(
-    n_estimators=300,
-    max_depth=6,
-    min_samples_split=4,
-    min_samples_leaf=2,
-    max_features="sqrt",
-    random_state=42,
-)
+rf_model = spec.build()
 
 # %%
-scores = cross_validate(
-    rf_model,
-    X,
-    y,
-    cv=kf,
-    scoring=("r2", "neg_mean_absolute_error", "neg_root_mean_squared_error"),
-)
+# CV folds from the training harness, in this process
+cv_results = evaluate(["v2"], workers=1)["v2"]["cv"]["model_units"]
+scores = {
+    f"test_{metric}": np.array(cv_results[metric]["folds"]) for metric in cv_results
+}
 
 print("Log-target RF CV R² scores:", np.round(scores["test_r2"], 3))
 print("Mean CV R²:", scores["test_r2"].mean().round(3))
 print("Std CV R²:", scores["test_r2"].std().round(3))
-print("Mean MAE:", (-scores["test_neg_mean_absolute_error"].mean()).round(3))
-print("Mean RMSE:", (-scores["test_neg_root_mean_squared_error"].mean()).round(3))
+print("Mean MAE:", scores["test_mae"].mean().round(3))
+print("Mean RMSE:", scores["test_rmse"].mean().round(3))
 
 # %%
 # Fit once on a train/test split so we can make prediction plots
 X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
+    X, y, test_size=spec.test_size, random_state=spec.test_seed
 )
 
 rf_model.fit(X_train, y_train)
@@ -3,16 +3,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import KFold, cross_validate, train_test_split
-from xgboost import XGBRegressor
+from sklearn.model_selection import train_test_split
+from train import MODEL_SPECS, evaluate, load_dataset
 
 # %%
-df = pd.read_csv("../data/cleaned/combined_datasets/v4/ml_dataset_v4.csv")
-
-# %%
-# Features and target
-X = df.drop(columns=["trips_per_dock", "name", "lat", "lon"])
-y = np.log1p(df["trips_per_dock"])
+# Features and log1p target, as specified in train.MODEL_SPECS
+spec = MODEL_SPECS["v4"]
+df, X, y = load_dataset("v4")
 
 print("X shape:", X.shape)
 print("y shape:", y.shape)
@@ -20,35 +17,15 @@ print(X.columns.tolist())
 
 # %%
 # XGBoost model
-model = XGBRegressor(
-    n_estimators=150,
-    max_depth=3,
-    learning_rate=0.05,
-    min_child_weight=5,
-    subsample=0.8,
-    colsample_bytree=0.8,
-    reg_alpha=0,
-    reg_lambda=1,
-    objective="reg:squarederror",
-    random_state=42,
-)
+model = spec.build()
 
 # %%
-# 5-fold cross-validation
-cv = KFold(n_splits=5, shuffle=True, random_state=42)
-
-cv_results = cross_validate(
-    model,
-    X,
-    y,
-    cv=cv,
-    scoring=["r2", "neg_mean_absolute_error", "neg_root_mean_squared_error"],
-    return_train_score=False,
-)
+# 5-fold cross-validation from the training harness, in this process
+cv_results = evaluate(["v4"], workers=1)["v4"]["cv"]["model_units"]
 
-cv_r2 = cv_results["test_r2"]
-cv_mae = -cv_results["test_neg_mean_absolute_error"]
-cv_rmse = -cv_results["test_neg_root_mean_squared_error"]
+cv_r2 = np.array(cv_results["r2"]["folds"])
+cv_mae = np.array(cv_results["mae"]["folds"])
+cv_rmse = np.array(cv_results["rmse"]["folds"])
 
 print("Log-target XGBoost CV R² scores:", np.round(cv_r2, 3))
 print("Mean CV R²:", round(cv_r2.mean(), 3))
@@ -59,7 +36,7 @@ print("Mean RMSE:", round(cv_rmse.mean(), 3))
 # %%
 # Final train/test split
 X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=21
+    X, y, test_size=spec.test_size, random_state=spec.test_seed
 )
 
 model.fit(X_train, y_train)
@@ -1,6 +1,86 @@
+# %%
+import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from train import MODEL_SPECS, evaluate, load_dataset
 
+# %%
+# the v4 specification on the v5 feature table, as in train.MODEL_SPECS;
+# station names come from the combined table (same row order)
 df_with_names = pd.read_csv(
     "../data/cleaned/combined_datasets/v5/combined_dataset_v5.csv"
 )
-df = pd.read_csv("../data/cleaned/combined_datasets/v5/ml_dataset_v5.csv")
+spec = MODEL_SPECS["v5"]
+df, X, y = load_dataset("v5")
+
+print("X shape:", X.shape)
+print("y shape:", y.shape)
+
+# %%
+model = spec.build()
+
+# %%
+# 5-fold cross-validation from the training harness, in this process
+cv_results = evaluate(["v5"], workers=1)["v5"]["cv"]["model_units"]
+
+cv_r2 = np.array(cv_results["r2"]["folds"])
+cv_mae = np.array(cv_results["mae"]["folds"])
+cv_rmse = np.array(cv_results["rmse"]["folds"])
+
+print("Log-target XGBoost CV R² scores:", np.round(cv_r2, 3))
+print("Mean CV R²:", round(cv_r2.mean(), 3))
+print("Std CV R²:", round(cv_r2.std(), 3))
+print("Mean MAE:", round(cv_mae.mean(), 3))
+print("Mean RMSE:", round(cv_rmse.mean(), 3))
+
+# %%
+# Final train/test split
+X_train, X_test, y_train, y_test = train_test_split(
+    X, y, test_size=spec.test_size, random_state=spec.test_seed
+)
+
+model.fit(X_train, y_train)
+
+# %%
+# Predictions, back in original units
+y_test_orig = np.expm1(y_test)
+y_pred_orig = np.expm1(model.predict(X_test))
+
+print("\nFinal Log-Target XGBoost Test Results (original units)")
+print("--------------------------------------------------")
+print("R²   :", round(r2_score(y_test_orig, y_pred_orig), 3))
+print("MAE  :", round(mean_absolute_error(y_test_orig, y_pred_orig), 3))
+print("RMSE :", round(np.sqrt(mean_squared_error(y_test_orig, y_pred_orig)), 3))
+
+# %%
+# Feature importance
+importance_df = pd.DataFrame(
+    {"feature": X.columns, "importance": model.feature_importances_}
+).sort_values("importance", ascending=False)
+
+print(importance_df.head(15))
+
+plt.figure(figsize=(10, 6))
+plt.barh(
+    importance_df["feature"].head(15)[::-1], importance_df["importance"].head(15)[::-1]
+)
+plt.xlabel("Feature Importance")
+plt.ylabel("Feature")
+plt.title("Top 15 XGBoost Feature Importances (v5)")
+plt.tight_layout()
+plt.show()
+
+# %%
+# Biggest errors
+results = pd.DataFrame(
+    {
+        "name": df_with_names.loc[X_test.index, "name"],
+        "actual": y_test_orig,
+        "predicted": y_pred_orig,
+        "abs_error": np.abs(y_test_orig - y_pred_orig),
+    }
+).sort_values("abs_error", ascending=False)
+
+results.head(10)
@@ -0,0 +1,43 @@
+"""XGBoost hyperparameters shared by the model notebooks and candidate scoring."""
+
+# models/v1.py: raw trips_per_dock target, picked by tuning.py's successive
+# halving over V1_PARAM_GRID on the training rows (holdout R² 0.810 on
+# ml_dataset_v1)
+XGB_V1_PARAMS = {
+    "n_estimators": 21,
+    "max_depth": 5,
+    "learning_rate": 0.1,
+    "min_child_weight": 1,
+    "subsample": 1.0,
+    "colsample_bytree": 1.0,
+    "objective": "reg:squarederror",
+    "random_state": 42,
+}
+
+# models/v3.py: log1p(trips_per_dock) target
+XGB_V3_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 3,
+    "learning_rate": 0.05,
+    "min_child_weight": 3,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "reg_alpha": 0,
+    "reg_lambda": 1,
+    "objective": "reg:squarederror",
+    "random_state": 42,
+}
+
+# models/v4.py: log1p(trips_per_dock) target
+XGB_V4_PARAMS = {
+    "n_estimators": 150,
+    "max_depth": 3,
+    "learning_rate": 0.05,
+    "min_child_weight": 5,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "reg_alpha": 0,
+    "reg_lambda": 1,
+    "objective": "reg:squarederror",
+    "random_state": 42,
+}
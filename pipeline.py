@@ -0,0 +1,729 @@
+"""
+Incremental runner for the data and model scripts.
+
+Each stage is one of the existing `# %%` scripts, declared with the files it
+reads and writes. A stage is rerun only when its fingerprint changes: the
+content hash of its input files plus its own source and every local module it
+imports (e.g. station_features.py for the v5 combine). Stage order and
+dependencies come from matching one stage's outputs to another's inputs, so
+editing ut_hotspots.csv reruns the curated-table conversion, the v5 combine and
+the v5 model, and nothing upstream of them.
+
+Scripts run in their own directory, exactly as when run by hand, so their
+relative paths (`../raw/...`, `../../cleaned/...`) keep working. Independent
+stages (the cleaning scripts, the five combines) run concurrently, `--jobs`
+at a time, and each run reports its wall time and peak RSS.
+
+    python pipeline.py                  # rerun every stale stage
+    python pipeline.py combined_v5      # a stage plus its stale upstreams
+    python pipeline.py --dry-run        # show what would run
+    python pipeline.py --force jobs     # rerun regardless of hashes
+    python pipeline.py -j 4             # at most four stages at once
+    python pipeline.py --mark-clean     # adopt the current outputs as built
+    python pipeline.py --allow-missing  # skip stages whose raw inputs are absent
+
+A stage whose declared inputs are missing is not run. Downstream stages
+still build from its existing outputs, but the stage is listed as missing
+and the run exits non-zero, unless the stage is `optional` (its inputs come
+from an opt-in download) or `--allow-missing` is given.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent
+STATE_PATH = ROOT / ".pipeline_state.json"
+LOG_DIR = ROOT / ".pipeline_logs"
+
+RAW = "data/raw/"
+CLEANED = "data/cleaned/"
+SCRIPTS = "data/scripts/"
+COMBINED = CLEANED + "combined_datasets/"
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    script: str
+    inputs: tuple = ()
+    outputs: tuple = ()
+    args: tuple = ()
+    # inputs come from an opt-in download; skip quietly until they exist
+    optional: bool = False
+
+
+def _artifact(path):
+    """CSV plus typed parquet written by artifacts.save_artifact."""
+    return (CLEANED + path + ".csv", CLEANED + path + ".parquet")
+
+
+OSM_EXTRACT = SCRIPTS + "cache/travis_county_pois.parquet"
+OSM_CACHE = tuple(
+    sorted(str(p.relative_to(ROOT)) for p in (ROOT / SCRIPTS / "cache").glob("*.json"))
+)
+
+CURATED = ("coords/coords", "amenities/dining_halls", "housing/dorms")
+CURATED += ("amenities/ut_hotspots", "housing/wampus_hotspots")
+CURATED += ("scoring/projected_stations",)
+
+V1_INPUTS = tuple(
+    CLEANED + path + ".parquet"
+    for path in (
+        "amenities/amenities",
+        "coords/coords",
+        "housing/housing",
+        "jobs/jobs",
+        "retail/retail",
+        "scoring/current_stations",
+        "transit/transit",
+    )
+) + (CLEANED + "amenities/parks.parquet",)
+
+V3_INPUTS = V1_INPUTS + (
+    CLEANED + "amenities/dining_halls.parquet",
+    CLEANED + "housing/dorms.parquet",
+)
+
+V5_INPUTS = tuple(
+    CLEANED + path + ".parquet"
+    for path in (
+        "amenities/amenities",
+        "coords/coords",
+        "housing/housing",
+        "jobs/jobs",
+        "retail/retail",
+        "scoring/current_stations",
+        "transit/transit",
+        "amenities/parks",
+        "amenities/dining_halls",
+        "housing/dorms",
+        "amenities/ut_hotspots",
+        "housing/wampus_hotspots",
+    )
+)
+
+INPUTS_BY_VERSION = {
+    1: V1_INPUTS,
+    2: V1_INPUTS,
+    3: V3_INPUTS,
+    4: V3_INPUTS,
+    5: V5_INPUTS,
+}
+
+
+def _combined_outputs(version):
+    prefix = f"{COMBINED}v{version}/"
+    return (
+        f"{prefix}combined_dataset_v{version}.csv",
+        f"{prefix}ml_dataset_v{version}.csv",
+    )
+
+
+STAGES = [
+    # raw -> cleaned
+    Stage(
+        "jobs",
+        SCRIPTS + "jobs.py",
+        (RAW + "employment/blocks.csv", RAW + "employment/jobs_per_block.csv"),
+        _artifact("jobs/jobs"),
+    ),
+    Stage(
+        "transit",
+        SCRIPTS + "transit.py",
+        (RAW + "transit/stops.txt",),
+        _artifact("transit/transit"),
+    ),
+    Stage(
+        "housing",
+        SCRIPTS + "housing.py",
+        tuple(RAW + "housing/block_shapes" + ext for ext in (".shp", ".shx", ".dbf"))
+        + (RAW + "housing/house_data.csv",),
+        _artifact("housing/housing"),
+    ),
+    Stage(
+        "parks",
+        SCRIPTS + "parks.py",
+        (RAW + "amenities/park_borders.csv",),
+        (CLEANED + "amenities/parks.csv", CLEANED + "amenities/parks.parquet"),
+    ),
+    # one parsed OSM extract, built from the Overpass responses osmnx cached
+    # under data/scripts/cache/, classified once into the POI table that the
+    # amenities and retail tables are sliced from
+    Stage("osm", SCRIPTS + "osm_extract.py", OSM_CACHE, (OSM_EXTRACT,)),
+    Stage("pois", SCRIPTS + "pois.py", (OSM_EXTRACT,), _artifact("pois/pois")),
+    Stage(
+        "amenities",
+        SCRIPTS + "amenities.py",
+        (CLEANED + "pois/pois.parquet",),
+        _artifact("amenities/amenities"),
+    ),
+    Stage(
+        "retail",
+        SCRIPTS + "retail.py",
+        (CLEANED + "pois/pois.parquet",),
+        _artifact("retail/retail"),
+    ),
+    Stage(
+        "coords",
+        SCRIPTS + "coords.py",
+        (RAW + "scoring/curr_station_rubric.xlsx", RAW + "coords/kiosk_locations.csv"),
+        _artifact("coords/semi_cleaned/raw_scores_with_coords"),
+    ),
+    Stage(
+        "scoring",
+        SCRIPTS + "scoring.py",
+        (
+            RAW + "scoring/curr_station_rubric.xlsx",
+            RAW + "scoring/tips_per_station.csv",
+        ),
+        _artifact("scoring/current_stations"),
+    ),
+    # hand-curated CSVs -> typed parquet
+    Stage(
+        "curated",
+        SCRIPTS + "artifacts.py",
+        tuple(CLEANED + path + ".csv" for path in CURATED),
+        tuple(CLEANED + path + ".parquet" for path in CURATED),
+        args=tuple(path.split("/")[1] for path in CURATED),
+    ),
+]
+
+# cleaned -> combined_dataset_vN / ml_dataset_vN -> model vN
+for _version, _inputs in INPUTS_BY_VERSION.items():
+    STAGES.append(
+        Stage(
+            f"combined_v{_version}",
+            f"{SCRIPTS}combined_datasets/combined_dataset_v{_version}.py",
+            _inputs,
+            _combined_outputs(_version)
+            # the v5 scaler parameters, for scaling new points at inference
+            + ((f"{COMBINED}v5/ml_dataset_v5.scaler.json",) if _version == 5 else ()),
+        )
+    )
+for _version in INPUTS_BY_VERSION:
+    _combined_csv, _ml_csv = _combined_outputs(_version)
+    _inputs = (_ml_csv, _combined_csv) if _version == 5 else (_ml_csv,)
+    STAGES.append(Stage(f"model_v{_version}", f"models/v{_version}.py", _inputs))
+# CV + holdout metrics of the train.MODEL_SPECS variants in one parallel
+# run; the versions are passed to train.py, so it evaluates exactly the
+# datasets the stage depends on
+TRAIN_VERSIONS = (1, 2, 3, 4, 5)
+STAGES.append(
+    Stage(
+        "train",
+        "models/train.py",
+        tuple(_combined_outputs(v)[1] for v in TRAIN_VERSIONS),
+        ("models/metrics/model_metrics.json",),
+        args=tuple(f"v{v}" for v in TRAIN_VERSIONS),
+    )
+)
+# bike isochrones per station; skipped until the bike graph has been
+# downloaded with street_network.py --download
+STAGES.append(
+    Stage(
+        "isochrones",
+        SCRIPTS + "combined_datasets/isochrones.py",
+        ("data/raw/network/travis_bike.graphml",)
+        + tuple(
+            CLEANED + path + ".parquet"
+            for path in (
+                "coords/coords",
+                "scoring/current_stations",
+                "jobs/jobs",
+                "housing/housing",
+                "transit/transit",
+                "amenities/amenities",
+                "retail/retail",
+            )
+        ),
+        (
+            CLEANED + "isochrones/station_isochrones.parquet",
+            *_artifact("isochrones/station_reach"),
+        ),
+        optional=True,
+    )
+)
+STAGES.append(
+    Stage(
+        "candidate_grid",
+        "models/candidate_grid.py",
+        V5_INPUTS + _combined_outputs(5)[:1] + OSM_CACHE,
+        (
+            "data/predictions/candidate_grid_trips_per_dock.tif",
+            "data/predictions/candidate_sites.csv",
+        ),
+    )
+)
+
+
+def _local_imports(script):
+    """Paths of the repo modules `script` imports, following them recursively."""
+    seen = set()
+    pending = [Path(script)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        search_dirs = [path.parent]
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module.split(".")[0])
+            elif (
+                isinstance(node, ast.Call)
+                and ast.unparse(node.func) == "sys.path.append"
+                and node.args
+                and isinstance(node.args[0], ast.Constant)
+            ):
+                search_dirs.append((path.parent / node.args[0].value).resolve())
+
+        for name in names:
+            for directory in search_dirs:
+                module = directory / f"{name}.py"
+                if module.exists():
+                    pending.append(module)
+                    break
+
+    return sorted(seen)
+
+
+class FileHasher:
+    """sha1 of file contents, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __call__(self, path):
+        stat = path.stat()
+        key = str(path.relative_to(ROOT))
+        entry = self.cache.get(key)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+
+def stage_fingerprint(stage, hasher):
+    """Hash of the stage's inputs, code and arguments; None if an input is missing."""
+    digest = hashlib.sha1(json.dumps(stage.args).encode())
+    code = _local_imports(ROOT / stage.script)
+    for path in [ROOT / p for p in stage.inputs] + code:
+        if not path.exists():
+            return None
+        digest.update(str(path.relative_to(ROOT)).encode())
+        digest.update(hasher(path).encode())
+    return digest.hexdigest()
+
+
+def upstream_stages(stages):
+    """Map each stage name to the names of the stages producing its inputs."""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            producers[output] = stage.name
+    return {
+        stage.name: sorted(
+            {producers[p] for p in stage.inputs if p in producers} - {stage.name}
+        )
+        for stage in stages
+    }
+
+
+def select_stages(stages, targets):
+    """`targets` plus everything upstream of them, in declaration order."""
+    if not targets:
+        return list(stages)
+
+    names = {stage.name for stage in stages}
+    unknown = set(targets) - names
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    upstream = upstream_stages(stages)
+    wanted = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(upstream[name])
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def load_state():
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text())
+    return {"stages": {}, "files": {}}
+
+
+def save_state(state):
+    STATE_PATH.write_text(json.dumps(state, indent=2, sort_keys=True))
+
+
+def stale_reason(stage, fingerprint, state):
+    """Why `stage` needs to run, or None when it is up to date."""
+    if fingerprint is None:
+        return None
+    record = state["stages"].get(stage.name)
+    if record is None:
+        return "never built"
+    if record["fingerprint"] != fingerprint:
+        return "inputs or code changed"
+    missing = [p for p in stage.outputs if not (ROOT / p).exists()]
+    if missing:
+        return f"missing {missing[0]}"
+    return None
+
+
+@dataclass
+class StageRun:
+    """Outcome of one stage's subprocess."""
+
+    name: str
+    returncode: int
+    seconds: float
+    peak_rss: int
+    log_path: Path
+    # stopped (or never started) because another stage failed
+    cancelled: bool = False
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return "cancelled"
+        return "ok" if self.ok else "failed"
+
+    def traceback(self):
+        """The script's traceback, or the tail of its log if there is none."""
+        lines = self.log_path.read_text(errors="replace").splitlines()
+        starts = [i for i, line in enumerate(lines) if line.startswith("Traceback")]
+        return "\n".join(lines[starts[-1] :] if starts else lines[-25:])
+
+
+class StageRunner:
+    """
+    Runs stage scripts as subprocesses, sampling each one's resident memory
+    (including any children it spawns) to report its peak RSS.
+
+    Every stage is already its own Python process, so the pool only needs
+    threads to wait on them; keeping the Popen handles in this process is what
+    lets a failure terminate the stages still running.
+    """
+
+    poll_seconds = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+        self._terminated = set()
+        self.cancelled = False
+
+    def __call__(self, stage):
+        script = ROOT / stage.script
+        LOG_DIR.mkdir(exist_ok=True)
+        log_path = LOG_DIR / f"{stage.name}.log"
+        env = dict(os.environ, MPLBACKEND="Agg")
+
+        start = time.perf_counter()
+        with open(log_path, "w") as log:
+            with self._lock:
+                if self.cancelled:
+                    return StageRun(stage.name, -1, 0.0, 0, log_path, cancelled=True)
+                proc = subprocess.Popen(
+                    [sys.executable, script.name, *stage.args],
+                    cwd=script.parent,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=env,
+                )
+                self._running[stage.name] = proc
+
+            peak_rss = 0
+            while True:
+                peak_rss = max(peak_rss, _tree_rss(proc.pid))
+                try:
+                    returncode = proc.wait(timeout=self.poll_seconds)
+                    break
+                except subprocess.TimeoutExpired:
+                    continue
+
+        with self._lock:
+            self._running.pop(stage.name, None)
+            cancelled = returncode != 0 and stage.name in self._terminated
+        return StageRun(
+            stage.name,
+            returncode,
+            time.perf_counter() - start,
+            peak_rss,
+            log_path,
+            cancelled=cancelled,
+        )
+
+    def cancel(self):
+        """Stop launching stages and terminate the ones still running."""
+        with self._lock:
+            self.cancelled = True
+            for name, proc in self._running.items():
+                self._terminated.add(name)
+                proc.terminate()
+
+
+def _tree_rss(pid):
+    """Resident bytes of process `pid` plus its descendants (0 once exited)."""
+    try:
+        proc = psutil.Process(pid)
+        procs = [proc, *proc.children(recursive=True)]
+    except psutil.Error:
+        return 0
+
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def missing_inputs(stage):
+    return [p for p in stage.inputs if not (ROOT / p).exists()]
+
+
+def plan_stage(stage, state, hasher, force, targets):
+    """(fingerprint, reason to run or None); fingerprint None if inputs missing."""
+    fingerprint = stage_fingerprint(stage, hasher)
+    if fingerprint is None:
+        missing = missing_inputs(stage)
+        if stage.optional:
+            print(f"[{stage.name}] skipped, input not available: {missing[:1]}")
+        else:
+            print(f"[{stage.name}] MISSING INPUTS, not run: {', '.join(missing)}")
+        return None, None
+
+    reason = stale_reason(stage, fingerprint, state)
+    if force and (not targets or stage.name in targets):
+        reason = "forced"
+    return fingerprint, reason
+
+
+def report_plan(stages, state, hasher, force, targets, mark_clean):
+    """--dry-run / --mark-clean: walk the stages without running anything."""
+    upstream = upstream_stages(stages)
+    rerun = set()
+    for stage in stages:
+        fingerprint, reason = plan_stage(stage, state, hasher, force, targets)
+        if fingerprint is None:
+            continue
+        if not mark_clean and reason is None and rerun & set(upstream[stage.name]):
+            reason = "upstream stage will rerun"
+
+        if reason is None:
+            print(f"[{stage.name}] up to date")
+        elif mark_clean:
+            state["stages"][stage.name] = {"fingerprint": fingerprint}
+            print(f"[{stage.name}] marked clean")
+        else:
+            rerun.add(stage.name)
+            print(f"[{stage.name}] would run ({reason})")
+
+
+def run_pipeline(
+    targets=(),
+    force=False,
+    dry_run=False,
+    mark_clean=False,
+    workers=None,
+    allow_missing=False,
+):
+    """
+    Run every stale stage in the selection, up to `workers` at a time.
+
+    A stage is started once every upstream stage has finished, and is only
+    then fingerprinted, so it sees its upstreams' fresh outputs. The first
+    failure cancels the queue, terminates running stages and prints the
+    failing stage's traceback. Non-optional stages with missing inputs
+    make the run return 1 unless `allow_missing`.
+    """
+    state = load_state()
+    hasher = FileHasher(state["files"])
+    stages = select_stages(STAGES, targets)
+
+    if dry_run or mark_clean:
+        report_plan(stages, state, hasher, force, targets, mark_clean)
+        if mark_clean:
+            save_state(state)
+        return 0
+
+    upstream = upstream_stages(stages)
+    pending = {stage.name: stage for stage in stages}
+    finished = set()
+    running = {}
+    runs = []
+    skipped = []
+    missing = {}
+    failed = None
+    runner = StageRunner()
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while pending or running:
+            progressed = False
+            for name, stage in list(pending.items()):
+                if failed or not set(upstream[name]) <= finished:
+                    continue
+                del pending[name]
+                progressed = True
+
+                fingerprint, reason = plan_stage(stage, state, hasher, force, targets)
+                if reason is None:
+                    if fingerprint is None:
+                        if stage.optional or allow_missing:
+                            skipped.append(name)
+                        else:
+                            missing[name] = missing_inputs(stage)
+                    else:
+                        print(f"[{name}] up to date")
+                    finished.add(name)
+                    continue
+
+                print(f"[{name}] running ({reason})")
+                running[pool.submit(runner, stage)] = (stage, fingerprint)
+
+            if not running:
+                if failed or not pending:
+                    break
+                if not progressed:
+                    raise RuntimeError(f"Stages never became ready: {list(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, fingerprint = running.pop(future)
+                run = future.result()
+                runs.append(run)
+
+                if run.ok:
+                    state["stages"][stage.name] = {
+                        "fingerprint": fingerprint,
+                        "seconds": round(run.seconds, 2),
+                        "peak_rss_mb": round(run.peak_rss / 2**20, 1),
+                    }
+                    save_state(state)
+                    finished.add(stage.name)
+                    print(
+                        f"[{stage.name}] done in {run.seconds:.1f}s, "
+                        f"peak RSS {run.peak_rss / 2**20:.0f} MB"
+                    )
+                elif failed is None:
+                    failed = run
+                    runner.cancel()
+
+    save_state(state)
+    if runs or missing:
+        # stages that never started because an earlier one failed
+        runs += [StageRun(name, -1, 0.0, 0, None, cancelled=True) for name in pending]
+        print_summary(runs, skipped, missing)
+    if failed is not None:
+        print(f"\n[{failed.name}] failed with exit code {failed.returncode}:")
+        print(failed.traceback())
+        print(f"full log in {failed.log_path.relative_to(ROOT)}")
+        return 1
+    if missing:
+        print("\nStages not run because declared inputs are missing:")
+        for name, paths in missing.items():
+            print(f"  {name}: {', '.join(paths)}")
+        print("(rerun with --allow-missing to skip them)")
+        return 1
+    return 0
+
+
+def print_summary(runs, skipped=(), missing=()):
+    """
+    One line per stage run, then the stages cancelled after a failure, the
+    ones not run for missing inputs and the skipped ones, which have no time
+    or memory.
+    """
+    print(f"\n{'stage':<14} {'status':<9} {'wall s':>8} {'peak MB':>9}")
+    for run in runs:
+        if run.cancelled and run.seconds == 0:
+            print(f"{run.name:<14} {run.status:<9} {'-':>8} {'-':>9}")
+            continue
+        print(
+            f"{run.name:<14} {run.status:<9} {run.seconds:>8.1f} "
+            f"{run.peak_rss / 2**20:>9.0f}"
+        )
+    for name in missing:
+        print(f"{name:<14} {'missing':<9} {'-':>8} {'-':>9}")
+    for name in skipped:
+        print(f"{name:<14} {'skipped':<9} {'-':>8} {'-':>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("targets", nargs="*", help="stages to build (default: all)")
+    parser.add_argument("--force", action="store_true", help="rerun the targets")
+    parser.add_argument("--dry-run", action="store_true", help="only report")
+    parser.add_argument(
+        "--mark-clean",
+        action="store_true",
+        help="record current inputs as built without running anything",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="stages to run at once (default: CPU count)",
+    )
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="skip stages with missing inputs instead of failing",
+    )
+    parser.add_argument("--list", action="store_true", help="list stages and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        upstream = upstream_stages(STAGES)
+        for stage in STAGES:
+            after = ", ".join(upstream[stage.name]) or "-"
+            print(f"{stage.name:<14} {stage.script:<55} after: {after}")
+        return 0
+
+    return run_pipeline(
+        args.targets,
+        args.force,
+        args.dry_run,
+        args.mark_clean,
+        args.jobs,
+        args.allow_missing,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
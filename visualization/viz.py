@@ -1,17 +1,22 @@
 # %%
+import sys
+
 import folium
 import numpy as np
 import pandas as pd
 
+sys.path.append("../data/scripts")
+from artifacts import load_artifact
+
 # ============================================================
 # Load data
 # ============================================================
-amenities = pd.read_csv("../data/cleaned/amenities/amenities.csv")
-coords = pd.read_csv("../data/cleaned/coords/coords.csv")
-jobs = pd.read_csv("../data/cleaned/jobs/jobs.csv")
-retail = pd.read_csv("../data/cleaned/retail/retail.csv")
-transit = pd.read_csv("../data/cleaned/transit/transit.csv")
-housing = pd.read_csv("../data/cleaned/housing/housing.csv")
+amenities = load_artifact("amenities")
+coords = load_artifact("coords")
+jobs = load_artifact("jobs")
+retail = load_artifact("retail")
+transit = load_artifact("transit")
+housing = load_artifact("housing")
 
 # ============================================================
 # Styling